@@ -0,0 +1,32 @@
+"""indexes for route filters
+
+Revision ID: 3c9e1b7d4a52
+Revises: f5fad7c676c7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e1b7d4a52'
+down_revision = 'f5fad7c676c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_news_is_private_created_date', 'news', ['is_private', 'created_date', 'id'])
+    op.create_index('ix_news_user_id_created_date', 'news', ['user_id', 'created_date'])
+    op.create_index('ix_space_objects_system_id', 'space_objects', ['system', 'id'])
+    op.create_index('ix_space_objects_creator', 'space_objects', ['creator'])
+    op.create_index('ix_space_systems_creator', 'space_systems', ['creator'])
+
+
+def downgrade():
+    op.drop_index('ix_space_systems_creator', table_name='space_systems')
+    op.drop_index('ix_space_objects_creator', table_name='space_objects')
+    op.drop_index('ix_space_objects_system_id', table_name='space_objects')
+    op.drop_index('ix_news_user_id_created_date', table_name='news')
+    op.drop_index('ix_news_is_private_created_date', table_name='news')
@@ -0,0 +1,36 @@
+"""media store
+
+Revision ID: 5b7e2c9d0f14
+Revises: 8d2f6a0c1e93
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e2c9d0f14'
+down_revision = '8d2f6a0c1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_blobs',
+                    sa.Column('hash', sa.String(), nullable=False),
+                    sa.Column('path', sa.String(), nullable=True),
+                    sa.Column('size', sa.Integer(), nullable=True),
+                    sa.Column('srcset', sa.String(), nullable=True),
+                    sa.Column('srcset_webp', sa.String(), nullable=True),
+                    sa.Column('refcount', sa.Integer(), nullable=True),
+                    sa.Column('created_date', sa.DateTime(), nullable=True),
+                    sa.Column('orphaned_date', sa.DateTime(), nullable=True),
+                    sa.PrimaryKeyConstraint('hash'),
+                    sa.UniqueConstraint('path'))
+    op.create_index('ix_media_blobs_refcount_orphaned_date', 'media_blobs', ['refcount', 'orphaned_date'])
+
+
+def downgrade():
+    op.drop_index('ix_media_blobs_refcount_orphaned_date', table_name='media_blobs')
+    op.drop_table('media_blobs')
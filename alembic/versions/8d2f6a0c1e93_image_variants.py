@@ -0,0 +1,32 @@
+"""image variants
+
+Revision ID: 8d2f6a0c1e93
+Revises: 3c9e1b7d4a52
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6a0c1e93'
+down_revision = '3c9e1b7d4a52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('news', sa.Column('photo_srcset', sa.String(), nullable=True))
+    op.add_column('news', sa.Column('photo_srcset_webp', sa.String(), nullable=True))
+    op.add_column('space_objects', sa.Column('image_srcset', sa.String(), nullable=True))
+    op.add_column('space_objects', sa.Column('image_srcset_webp', sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('space_objects') as batch_op:
+        batch_op.drop_column('image_srcset_webp')
+        batch_op.drop_column('image_srcset')
+    with op.batch_alter_table('news') as batch_op:
+        batch_op.drop_column('photo_srcset_webp')
+        batch_op.drop_column('photo_srcset')
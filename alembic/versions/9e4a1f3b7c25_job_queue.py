@@ -0,0 +1,36 @@
+"""job queue
+
+Revision ID: 9e4a1f3b7c25
+Revises: 5b7e2c9d0f14
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4a1f3b7c25'
+down_revision = '5b7e2c9d0f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('kind', sa.String(), nullable=True),
+                    sa.Column('payload', sa.String(), nullable=True),
+                    sa.Column('status', sa.String(), nullable=True),
+                    sa.Column('attempts', sa.Integer(), nullable=True),
+                    sa.Column('error', sa.String(), nullable=True),
+                    sa.Column('created_date', sa.DateTime(), nullable=True),
+                    sa.Column('run_at', sa.DateTime(), nullable=True),
+                    sa.Column('started_date', sa.DateTime(), nullable=True),
+                    sa.PrimaryKeyConstraint('id'))
+    op.create_index('ix_jobs_status_run_at', 'jobs', ['status', 'run_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,72 @@
+import json
+import sqlite3
+import urllib.parse
+import urllib.request
+import numpy as np
+from orbits import PLANETS
+
+MAX_ECCENTRICITY = 0.99  # эллиптические орбиты; e >= 1 не поддерживаются
+API_PAGE = 200  # записей на странице /api/space_objects (максимум сервера)
+API_TIMEOUT = 30  # ожидание ответа сервера, с
+
+
+class Catalog:
+    """Тела звёздной системы: названия, тип, элементы орбит (а.е., годы) и масса (массы Земли)"""
+
+    def __init__(self, title, names, kinds, a, period, e, m):
+        self.title = title
+        self.names = list(names)
+        self.kinds = list(kinds)
+        a = np.maximum(np.nan_to_num(np.asarray(a, dtype=np.float64)), 0)
+        period = np.nan_to_num(np.asarray(period, dtype=np.float64))
+        self.a = a
+        self.period = np.where(period > 0, period, a ** 1.5)  # третий закон Кеплера, если период не указан
+        self.e = np.clip(np.nan_to_num(np.asarray(e, dtype=np.float64)), 0, MAX_ECCENTRICITY)
+        self.m = np.maximum(np.nan_to_num(np.asarray(m, dtype=np.float64)), 0)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_rows(cls, title, rows):
+        """Каталог из строк (название, тип, большая полуось, период, эксцентриситет, масса)"""
+        names, kinds, *numbers = zip(*rows) if rows else [()] * 6
+        return cls(title, names, kinds, *[[np.nan if value is None else value for value in column]
+                                          for column in numbers])
+
+
+def builtin():
+    """Солнечная система без сервера и базы (значения из базы AstroCat)"""
+    rows = [('Солнце', 'Звезда', 0, 0, 0, 333000)]
+    rows += [(name, 'Планета', a, period, e, None) for name, a, period, e in PLANETS]
+    return Catalog.from_rows('Солнечная система', rows)
+
+
+def from_db(path, system_id):
+    """Каталог системы из файла базы AstroCat (только чтение)"""
+    with sqlite3.connect(f'file:{urllib.parse.quote(path)}?mode=ro', uri=True) as connection:
+        title = connection.execute('SELECT name FROM space_systems WHERE id = ?', (system_id,)).fetchone()
+        if title is None:
+            raise LookupError(f'Space system {system_id} not found')
+        rows = connection.execute('SELECT name, space_type, radius, period, ex, m FROM space_objects '
+                                  'WHERE system = ? ORDER BY id', (system_id,)).fetchall()
+    return Catalog.from_rows(title[0], rows)
+
+
+def from_api(base_url, system_id):
+    """Каталог системы с сервера AstroCat: страницы /api/space_objects по курсору"""
+    system = _get_json(base_url, f'/api/space_systems/{system_id}')['space_system']
+    rows = []
+    url = '/api/space_objects?' + urllib.parse.urlencode({'system': system_id, 'limit': API_PAGE})
+    while url:
+        page = _get_json(base_url, url)
+        rows += [(item['name'], item['space_type'], item['radius'], item['period'], item['ex'], item['m'])
+                 for item in page['space_objects']]
+        url = page['next']
+    return Catalog.from_rows(system['name'], rows)
+
+
+def _get_json(base_url, path):
+    """GET-запрос к api"""
+    with urllib.request.urlopen(urllib.parse.urljoin(base_url, path), timeout=API_TIMEOUT) as response:
+        return json.load(response)
@@ -1,104 +1,112 @@
+import argparse
 import sys
 import webbrowser
-from PyQt5.QtCore import QPropertyAnimation
-from PyQt5.QtGui import QPainterPath, QPainter
+from PyQt5.QtCore import QElapsedTimer, Qt, QTimer
 from PyQt5.QtWidgets import QApplication, QMainWindow
+from catalog import from_api, from_db
 from main_window import Ui_MainWindow
 
-OBJECTS_NAMES = ['Солнце', 'Меркурий', 'Венера', 'Земля', 'Марс', 'Юпитер', 'Сатурн', 'Уран', 'Нептун', 'Плутон']
+SITE_URL = 'https://astrocat.herokuapp.com'  # сайт AstroCat со страницами объектов
+FRAME_INTERVAL = 16  # период кадра, мс (~60 кадров/с)
+READOUT_INTERVAL = 500  # как часто обновлять время кадра в строке состояния, мс
 
 
 class ModelSolarSystem(QMainWindow, Ui_MainWindow):
 
-    # загружаем все объекты в окне
-    def __init__(self):
+    # загружаем все объекты в окне; catalog - система из базы или api (по умолчанию Солнечная система)
+    def __init__(self, catalog=None, site_url=SITE_URL):
         super().__init__()
         self.setupUi(self)
-        self.solar_views = [self.sun, self.mercury, self.venerus, self.earth, self.mars,
-                            self.jupiter, self.saturn, self.uran, self.neptun, self.pluton]
-        self.start_positions = []
-        for i in self.solar_views:
-            self.start_positions.append((i.x(), i.y()))
+        self.site_url = site_url.rstrip('/')
+        if catalog is not None:
+            self.solar_view.set_catalog(catalog)
+            self.setWindowTitle(f'Модель: {catalog.title}')
+        self.model_time = 0.0  # время модели, годы
+        self.direction = 1  # 1 - вперёд, -1 - назад
+        self.frames = 0  # кадров с прошлого обновления строки состояния
+        self.frame_clock = QElapsedTimer()
+        self.readout_clock = QElapsedTimer()
         self.initButtons()
-        self.initOrbits()
-        self.initAnimations()
-        self.repaint()
+        self.initTimer()
+        self.show_readout()
 
-    # привязываем все кнопки к методам, элементам класса SolarObject, сохраняем начальные позиции
-    # всех объектов Солнечной системы
+    # привязываем все кнопки к методам
     def initButtons(self):
-        for view in self.solar_views:
-            view.clicked.connect(self.show_info)
+        self.solar_view.clicked.connect(self.show_info)
         self.up_button.clicked.connect(self.start)
         self.down_button.clicked.connect(self.start)
         self.stop_button.clicked.connect(self.stop)
         self.reset_button.clicked.connect(self.reset)
 
-    # создаём орбиты для планет
-    def initOrbits(self):
-        self.orbits = []
-        k, r = 0, 1
-        for i in range(1, 10):
-            orbit = QPainterPath()
-            orbit.addEllipse(480 - k, 330 - k, int(r * 140), int(r * 140))
-            k += 35
-            r += 0.5
-            self.orbits.append(orbit)
-
-    # создаём анимации движения для каждой планеты
-    def initAnimations(self):
-        self.animations = []
-        for i in range(9):
-            anim = QPropertyAnimation(self.solar_views[i + 1], b'pos')
-            anim.setDuration(10000 * (i + 1))
-            values = [p / 100 for p in range(0, 101)]
-            # устанавливаем в процентном соотношении точки, которые нужно пройти во время анимации
-            for j in values:
-                anim.setKeyValueAt(j, self.orbits[i].pointAtPercent(j))
-            anim.setLoopCount(10000)
-            self.animations.append(anim)
-
-    # рисуем орбиты для планет
-    def paintEvent(self, event):
-        qp = QPainter()
-        qp.begin(self)
-        for p in self.orbits:
-            qp.drawPath(p)
-        qp.end()
-
-    # начинаем анимацию
+    # один таймер на все тела: каждый кадр положения считаются заново по времени модели
+    def initTimer(self):
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(FRAME_INTERVAL)
+        self.timer.timeout.connect(self.tick)
+
+    # кадр: время модели сдвигается на реально прошедшее время, умноженное на скорость
+    def tick(self):
+        elapsed = self.frame_clock.restart() / 1000
+        self.model_time += self.direction * self.speed_box.value() * elapsed
+        self.solar_view.set_time(self.model_time)
+        self.frames += 1
+        if self.readout_clock.elapsed() >= READOUT_INTERVAL:
+            self.show_readout()
+
+    # время кадра, частота кадров и время отрисовки в строке состояния
+    def show_readout(self):
+        text = (f'Время модели: {self.model_time:.2f} лет | тел на экране: {self.solar_view.visible_count}'
+                f' из {len(self.solar_view.catalog)}')
+        if self.timer.isActive() and self.frames:
+            interval = self.readout_clock.restart() / self.frames
+            text += (f' | кадр: {interval:.1f} мс ({1000 / interval:.0f} кадров/с)'
+                     f' | отрисовка: {self.solar_view.paint_time * 1000:.2f} мс')
+        self.frames = 0
+        self.statusbar.showMessage(text)
+
+    # начинаем движение вперёд или назад
     def start(self):
-        for a in self.animations:
-            if self.sender().objectName() == 'down_button':
-                a.setDirection(0)
-            else:
-                a.setDirection(1)
-            a.start()
-
-    # ставим анимацию на паузу
+        self.direction = -1 if self.sender().objectName() == 'down_button' else 1
+        if not self.timer.isActive():
+            self.frame_clock.start()
+            self.readout_clock.start()
+            self.frames = 0
+            self.timer.start()
+
+    # ставим модель на паузу: таймер останавливается, процессор не занят
     def stop(self):
-        for a in self.animations:
-            a.pause()
+        self.timer.stop()
+        self.show_readout()
 
-    # останавливаем анимацию и возвращаем планеты на изначальные позиции
+    # останавливаем модель и возвращаем планеты на изначальные позиции
     def reset(self):
-        for a in self.animations:
-             a.stop()
-        for i in range(1, len(self.solar_views)):
-            self.solar_views[i].move(self.start_positions[i][0], self.start_positions[i][1])
+        self.timer.stop()
+        self.model_time = 0.0
+        self.solar_view.set_time(self.model_time)
+        self.show_readout()
 
     # открываем страницу в браузере с информацией об объекте Солнечной системы
-    def show_info(self):
-        view = self.sender().objectName()
-        for i in range(len(self.solar_views)):
-            if self.solar_views[i].objectName() == view:
-                url = f'https://astrocat.herokuapp.com/space_object/{OBJECTS_NAMES[i]}'
-                webbrowser.open(url)
-                break
+    def show_info(self, name):
+        webbrowser.open(f'{self.site_url}/space_object/{name}')
+
+
+# система для показа из аргументов командной строки
+def load_catalog(args):
+    if args.api:
+        return from_api(args.api, args.system)
+    if args.db:
+        return from_db(args.db, args.system)
+    return None
 
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    ex = ModelSolarSystem()
+    parser = argparse.ArgumentParser(description='Модель звёздной системы AstroCat')
+    parser.add_argument('--api', help='адрес сервера AstroCat, например http://127.0.0.1:8080')
+    parser.add_argument('--db', help='файл базы AstroCat')
+    parser.add_argument('--system', type=int, default=1, help='id звёздной системы')
+    args = parser.parse_args()
+    app = QApplication(sys.argv[:1])
+    ex = ModelSolarSystem(load_catalog(args), args.api or SITE_URL)
     ex.show()
     sys.exit(app.exec())
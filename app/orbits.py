@@ -0,0 +1,87 @@
+import numpy as np
+
+# название, большая полуось (а.е.), период (годы), эксцентриситет - как в базе AstroCat
+PLANETS = (
+    ('Меркурий', 0.39, 0.24, 0.206),
+    ('Венера', 0.72, 0.61, 0.007),
+    ('Земля', 1.0, 1.0, 0.017),
+    ('Марс', 1.52, 1.88, 0.093),
+    ('Юпитер', 5.2, 11.86, 0.048),
+    ('Сатурн', 9.54, 29.46, 0.054),
+    ('Уран', 19.19, 84.02, 0.046),
+    ('Нептун', 30.07, 164.78, 0.008),
+    ('Плутон', 39.52, 247.7, 0.253),
+)
+KEPLER_TOLERANCE = 1e-9  # точность решения уравнения Кеплера, рад
+KEPLER_MAX_ITERATIONS = 20
+WARM_START_TURNS = 0.02  # если тело с прошлого кадра прошло больше такой доли оборота, решение прошлого кадра
+# не годится как начальное приближение - берётся приближение Markley
+# коэффициенты начального приближения Markley (1995), как в data/ephemeris.py сайта
+STARTER_ALPHA = 3 * np.pi ** 2 / (np.pi ** 2 - 6)
+STARTER_ALPHA_M = 1.6 * np.pi / (np.pi ** 2 - 6)
+
+
+def starter(mean_anomaly, e):
+    """Начальное приближение эксцентрической аномалии с точностью ~1e-3 при любом e < 1 (без итераций)"""
+    wrapped = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi  # формула рассчитана на M в [-pi, pi]
+    alpha = STARTER_ALPHA + STARTER_ALPHA_M * (np.pi - np.abs(wrapped)) / (1 + e)
+    d = 3 * (1 - e) + alpha * e
+    m2 = wrapped * wrapped
+    q = 2 * alpha * d * (1 - e) - m2
+    r = (3 * alpha * d * (d - 1 + e) + m2) * wrapped
+    w = np.cbrt(np.abs(r) + np.sqrt(q * q * q + r * r))
+    w *= w
+    return (2 * r * w / (w * w + w * q + q * q) + wrapped) / d + (mean_anomaly - wrapped)
+
+
+class Orbits:
+    """Положения тел на эллиптических орбитах по периоду и эксцентриситету.
+
+    Уравнение Кеплера решается методом Ньютона сразу для всех тел. Начальное приближение - поправка
+    E - M = e sin E из прошлого кадра, если тело сдвинулось меньше чем на WARM_START_TURNS оборота
+    (тогда хватает одной-двух итераций), иначе - приближение Markley. Сходимость проверяется для
+    каждого тела отдельно, следующая итерация считается только для тех, что ещё не сошлись.
+    Поправка прошлого кадра ограничивается |E - M| <= e; тела, не сошедшиеся от неё, решаются заново
+    от приближения Markley, а несошедшееся решение не сохраняется как приближение для следующего кадра."""
+
+    def __init__(self, period, eccentricity):
+        self.revolutions = 1 / np.asarray(period, dtype=np.float64)  # оборотов в год
+        self.e = np.asarray(eccentricity, dtype=np.float64)
+        self.offset = np.zeros_like(self.e)  # E - M в прошлый момент
+        self.turns = np.zeros_like(self.e)  # число оборотов в прошлый момент
+
+    def anomalies(self, t):
+        """Эксцентрические аномалии всех тел в момент t (годы; в момент 0 тела в перицентре)"""
+        turns = self.revolutions * t
+        mean_anomaly = 2 * np.pi * (turns - np.floor(turns))  # быстрее np.remainder
+        anomaly = mean_anomaly + np.clip(self.offset, -self.e, self.e)  # |e sin E| <= e
+        cold = np.flatnonzero(~(np.abs(turns - self.turns) <= WARM_START_TURNS))
+        anomaly[cold] = starter(mean_anomaly[cold], self.e[cold])
+        failed = self.newton(anomaly, mean_anomaly, np.arange(len(anomaly)))
+        if failed.size:  # приближение прошлого кадра оказалось плохим - заново от Markley
+            anomaly[failed] = starter(mean_anomaly[failed], self.e[failed])
+            failed = self.newton(anomaly, mean_anomaly, failed)
+        self.turns = turns
+        offset = anomaly - mean_anomaly
+        offset[failed] = 0.0  # несошедшееся решение не годится в приближение: следующий кадр начнёт с M
+        self.offset = offset
+        return anomaly
+
+    def newton(self, anomaly, mean_anomaly, active):
+        """Итерации Ньютона для тел active (на месте, в anomaly); индексы тел, которые не сошлись"""
+        for _ in range(KEPLER_MAX_ITERATIONS):
+            if not active.size:
+                break
+            current, e = anomaly[active], self.e[active]
+            delta = (current - e * np.sin(current) - mean_anomaly[active]) / (1 - e * np.cos(current))
+            anomaly[active] = current - delta
+            active = active[~(np.abs(delta) < KEPLER_TOLERANCE)]  # nan - тоже не сошлось
+        return active
+
+    def positions(self, t, semi_major):
+        """Координаты тел относительно звезды (в фокусе орбиты), в единицах semi_major: массив (тела, 2)"""
+        anomaly = self.anomalies(t)
+        semi_major = np.asarray(semi_major, dtype=np.float64)
+        x = semi_major * (np.cos(anomaly) - self.e)
+        y = -semi_major * np.sqrt(1 - self.e ** 2) * np.sin(anomaly)  # ось y экрана направлена вниз
+        return np.stack((x, y), axis=-1)
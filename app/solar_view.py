@@ -0,0 +1,288 @@
+import time
+import numpy as np
+from PyQt5.QtCore import QPointF, QRect, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor, QPainter, QPalette, QPen, QPixmap, QPolygonF, QRadialGradient
+from PyQt5.QtWidgets import QWidget
+from catalog import builtin
+from orbits import Orbits
+
+# диаметр (px), цвет края и цвет центра тел Солнечной системы
+STYLES = {
+    'Солнце': (80, (255, 68, 0), (255, 255, 0)),
+    'Меркурий': (16, (187, 57, 0), (255, 255, 255)),
+    'Венера': (20, (235, 148, 61), (255, 255, 255)),
+    'Земля': (26, (0, 0, 206), (255, 255, 255)),
+    'Марс': (20, (255, 0, 0), (255, 255, 255)),
+    'Юпитер': (34, (157, 152, 140), (255, 255, 255)),
+    'Сатурн': (32, (235, 142, 0), (255, 255, 255)),
+    'Уран': (30, (0, 174, 255), (255, 255, 255)),
+    'Нептун': (28, (0, 32, 255), (255, 255, 255)),
+    'Плутон': (12, (117, 13, 13), (255, 255, 255)),
+}
+KIND_COLORS = {'Звезда': (255, 150, 0), 'Планета': (40, 100, 200), 'Карликовая планета': (140, 90, 60)}
+DEFAULT_COLOR = (90, 90, 90)
+STAR_SIZE = 40  # диаметр звезды, px
+ORBIT_RADIUS = 70  # большая полуось первой орбиты в схеме, px
+ORBIT_SPACING = 35  # расстояние между орбитами в схеме, px
+SCHEMATIC_LIMIT = 20  # системы до стольких тел рисуются схемой: орбиты через равные промежутки, а не в масштабе
+POINT_SIZE = 3  # тела меньше этого диаметра (px) рисуются точками, пачкой на каждый цвет
+SPRITE_LIMIT = 300  # если кругов на экране больше - мелкие тела рисуются точками
+ORBIT_LIMIT = 100  # орбиты рисуются только у стольких самых крупных тел
+LABEL_LIMIT = 30  # подписи орбит, только если орбит на экране не больше
+DIRTY_LIMIT = 64  # если тел больше, окно перерисовывается целиком, а не по прямоугольникам тел
+DIRTY_MARGIN = 2  # запас вокруг тела при перерисовке части окна: сглаживание выходит за край круга, px
+HIT_RADIUS = 4  # в точку-тело можно попасть на таком расстоянии, px
+CLICK_DISTANCE = 4  # сдвиг мыши, после которого нажатие считается перетаскиванием, px
+ZOOM_STEP = 1.25  # масштаб за один шаг колеса мыши
+ZOOM_RANGE = (0.2, 1e5)  # пределы масштаба относительно вписанной в окно системы
+FIT_MARGIN = 0.95  # доля окна, которую занимает система при вписывании
+LABEL_COLOR = (128, 128, 128)
+
+
+def body_brush(diameter, edge, center=(255, 255, 255)):
+    """Заливка тела: радиальный градиент от центра к краю"""
+    gradient = QRadialGradient(QPointF(0, 0), diameter / 2)
+    gradient.setColorAt(0, QColor(*center))
+    gradient.setColorAt(1, QColor(*edge))
+    return QBrush(gradient)
+
+
+def body_style(name, kind, mass):
+    """Диаметр (px), цвет края и центра тела: тела Солнечной системы - как раньше, остальные по типу и массе"""
+    if name in STYLES:
+        return STYLES[name]
+    if kind == 'Звезда':
+        return STAR_SIZE, KIND_COLORS[kind], (255, 255, 0)
+    diameter = float(round(np.clip(6 + 3 * np.log10(mass), 2, 30))) if mass > 0 else 2.0  # целые: меньше видов тел
+    return diameter, KIND_COLORS.get(kind, DEFAULT_COLOR), (255, 255, 255)
+
+
+def points_polygon(points):
+    """QPolygonF из массива (n, 2) без цикла по точкам: координаты копируются прямо в память полигона"""
+    polygon = QPolygonF(len(points))
+    if len(points):
+        data = polygon.data()
+        data.setsize(points.size * 8)
+        np.frombuffer(data, dtype=np.float64).reshape(-1, 2)[:] = points
+    return polygon
+
+
+class SolarSystemView(QWidget):
+    """Модель звёздной системы: все тела рисуются в одном paintEvent по положениям из элементов орбит.
+
+    Неподвижная часть (фон, орбиты, подписи) рисуется в QPixmap и пересоздаётся только при изменении
+    размера, плотности пикселей, масштаба или сдвига. Тела за краем окна отбрасываются, мелкие рисуются
+    точками - одним вызовом на цвет, кругами - только крупные. В небольших системах перерисовываются
+    лишь прямоугольники тел в старом и новом положении.
+    Колесо мыши - масштаб, перетаскивание - сдвиг, двойной щелчок - вписать систему в окно."""
+
+    clicked = pyqtSignal(str)  # название тела, на которое нажали
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # фон рисуем сами, Qt не нужно его предварительно заливать
+        self.paint_time = 0.0  # время последней отрисовки, с
+        self.visible_count = 0  # тел на экране в последнем кадре
+        self.press_pos = self.drag_pos = None
+        self.set_catalog(builtin())
+
+    def set_catalog(self, catalog, t=0.0):
+        """Показ другой системы"""
+        self.catalog = catalog
+        orbiting = catalog.a > 0
+        if len(catalog) <= SCHEMATIC_LIMIT:
+            rank = np.argsort(np.argsort(np.where(orbiting, catalog.a, np.inf), kind='stable'), kind='stable')
+            self.semi_major = np.where(orbiting, ORBIT_RADIUS + ORBIT_SPACING * rank, 0.0)
+        else:
+            self.semi_major = catalog.a
+        self.orbits = Orbits(np.where(orbiting, catalog.period, 1.0), catalog.e)
+        self.styles = [body_style(*body) for body in zip(catalog.names, catalog.kinds, catalog.m)]
+        self.diameters = np.array([style[0] for style in self.styles], dtype=np.float64)
+        self.sprites = {}  # (вид тела, плотность пикселей) -> QPixmap
+        colors = {}
+        for index, style in enumerate(self.styles):
+            colors.setdefault(style[1], []).append(index)
+        self.color_groups = [(QColor(*color), np.array(indices)) for color, indices in colors.items()]
+        largest = np.flatnonzero(orbiting)[np.argsort(-self.diameters[orbiting], kind='stable')]
+        self.orbit_bodies = np.sort(largest[:ORBIT_LIMIT])
+        self.extent = max((self.semi_major * (1 + self.orbits.e)).max(initial=0), self.diameters.max(initial=1))
+        self.positions = np.zeros((len(catalog), 2))
+        self.visible = np.arange(0)
+        self.screen = np.zeros((0, 2))
+        self.static_layer = None
+        self.fit()
+        self.set_time(t)
+
+    def fit(self):
+        """Масштаб, при котором все орбиты помещаются в окне, звезда в центре"""
+        self.zoom_level = 1.0  # масштаб относительно вписанной системы
+        self.pan = np.zeros(2)  # сдвиг звезды от центра окна, px
+        self.update()
+
+    @property
+    def scale(self):
+        """Пикселей экрана на единицу длины системы (а.е. или шаг схемы)"""
+        return self.zoom_level * FIT_MARGIN * min(self.width(), self.height()) / 2 / self.extent
+
+    def star(self):
+        """Положение звезды (фокуса орбит) на экране"""
+        return np.array((self.width() / 2, self.height() / 2)) + self.pan
+
+    def body_rects(self, positions):
+        """Прямоугольники тел на экране с запасом на сглаживание: массив (тела, 4) - left, top, right, bottom"""
+        center = self.star() + positions * self.scale
+        radius = (self.diameters / 2 + DIRTY_MARGIN)[:, None]
+        return np.hstack((np.floor(center - radius), np.ceil(center + radius))).astype(int)
+
+    def set_time(self, t):
+        """Положения тел в момент t (годы); в небольших системах перерисовываются только области,
+        где тела были и куда сдвинулись"""
+        if len(self.positions) > DIRTY_LIMIT:
+            self.positions = self.orbits.positions(t, self.semi_major)
+            self.update()
+            return
+        old = self.body_rects(self.positions)
+        self.positions = self.orbits.positions(t, self.semi_major)
+        new = self.body_rects(self.positions)
+        union = np.hstack((np.minimum(old[:, :2], new[:, :2]), np.maximum(old[:, 2:], new[:, 2:])))
+        for left, top, right, bottom in union[(old != new).any(axis=1)]:
+            self.update(QRect(int(left), int(top), int(right - left), int(bottom - top)))  # Qt объединит области
+
+    def static_key(self):
+        """От чего зависит неподвижная часть сцены"""
+        return self.size(), self.devicePixelRatioF(), self.scale, tuple(self.pan)
+
+    def render_static_layer(self):
+        """Фон, видимые орбиты и их подписи в QPixmap с плотностью пикселей экрана"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(round(self.width() * ratio), round(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(self.palette().color(QPalette.Window))
+        a = self.semi_major[self.orbit_bodies] * self.scale
+        e = self.orbits.e[self.orbit_bodies]
+        b = a * np.sqrt(1 - e ** 2)
+        star_x, star_y = self.star()
+        center = star_x - a * e  # звезда в фокусе, перицентр справа
+        shown = ((center + a >= 0) & (center - a <= self.width()) & (star_y + b >= 0)
+                 & (star_y - b <= self.height()) & (b >= 1))
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(Qt.black, 1))
+        for x, half_width, half_height in zip(center[shown], a[shown], b[shown]):
+            painter.drawEllipse(QPointF(x, star_y), half_width, half_height)
+        if shown.sum() <= LABEL_LIMIT:
+            painter.setPen(QColor(*LABEL_COLOR))
+            metrics = painter.fontMetrics()
+            for index, x, half_height in zip(self.orbit_bodies[shown], center[shown], b[shown]):
+                name = self.catalog.names[index]  # подпись над верхней точкой орбиты
+                painter.drawText(QPointF(x - metrics.horizontalAdvance(name) / 2,
+                                         star_y - half_height - metrics.descent() - 1), name)
+        painter.end()
+        self.static_layer = pixmap
+        self.static_layer_key = self.static_key()
+
+    def sprite(self, index):
+        """Изображение тела: круг с градиентом рисуется один раз на каждый вид тел, дальше копируется"""
+        style = self.styles[index]
+        ratio = self.devicePixelRatioF()
+        if (style, ratio) not in self.sprites:
+            diameter = style[0]
+            size = int(np.ceil(diameter)) + 2  # по пикселю на сглаживание края
+            pixmap = QPixmap(round(size * ratio), round(size * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.translate(size / 2, size / 2)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(body_brush(*style))
+            painter.drawEllipse(QRectF(-diameter / 2, -diameter / 2, diameter, diameter))
+            painter.end()
+            self.sprites[style, ratio] = pixmap
+        return self.sprites[style, ratio]
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        if self.static_layer is None or self.static_layer_key != self.static_key():
+            self.render_static_layer()
+        painter = QPainter(self)
+        ratio = self.static_layer.devicePixelRatio()
+        for rect in event.region().rects():
+            source = QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+            painter.drawPixmap(QRectF(rect), self.static_layer, source)
+        screen = self.star() + self.positions * self.scale
+        radius = self.diameters / 2
+        visible = ((screen[:, 0] + radius >= 0) & (screen[:, 0] - radius <= self.width())
+                   & (screen[:, 1] + radius >= 0) & (screen[:, 1] - radius <= self.height()))
+        sprites = visible & (self.diameters >= POINT_SIZE)
+        if sprites.sum() > SPRITE_LIMIT:  # кругами рисуются только самые крупные тела
+            candidates = np.flatnonzero(sprites)
+            sprites[:] = False
+            sprites[candidates[np.argpartition(-self.diameters[candidates], SPRITE_LIMIT)[:SPRITE_LIMIT]]] = True
+        points = visible & ~sprites  # точки без сглаживания: квадраты в 2 px
+        for color, indices in self.color_groups:
+            shown = indices[points[indices]]
+            if shown.size:
+                painter.setPen(QPen(color, POINT_SIZE - 1, Qt.SolidLine, Qt.SquareCap))
+                painter.drawPoints(points_polygon(screen[shown]))
+        partial = len(self.positions) <= DIRTY_LIMIT  # перерисовка по прямоугольникам тел
+        dirty = event.region()
+        for index in np.flatnonzero(sprites):
+            sprite = self.sprite(index)
+            half = sprite.width() / sprite.devicePixelRatio() / 2
+            x, y = screen[index] - half
+            if partial and not dirty.intersects(QRect(int(x), int(y), int(2 * half) + 1, int(2 * half) + 1)):
+                continue
+            painter.drawPixmap(QPointF(x, y), sprite)
+        painter.end()
+        self.visible = np.flatnonzero(visible)
+        self.screen = screen[self.visible]
+        self.visible_count = len(self.visible)
+        self.paint_time = time.perf_counter() - started
+
+    def body_at(self, point):
+        """Индекс тела под точкой экрана или None (при перекрытии - ближайшее к точке).
+        Проверяются только тела, видимые в последнем кадре"""
+        distance = np.hypot(*(self.screen - (point.x(), point.y())).T)
+        inside = np.flatnonzero(distance <= np.maximum(self.diameters[self.visible] / 2, HIT_RADIUS))
+        if not inside.size:
+            return None
+        return int(self.visible[inside[np.argmin(distance[inside])]])
+
+    def zoom(self, factor, anchor):
+        """Изменение масштаба; точка экрана anchor остаётся на месте"""
+        zoom_level = float(np.clip(self.zoom_level * factor, *ZOOM_RANGE))
+        self.pan += (np.asarray(anchor) - self.star()) * (1 - zoom_level / self.zoom_level)
+        self.zoom_level = zoom_level
+        self.update()
+
+    def wheelEvent(self, event):
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom(ZOOM_STEP ** steps, (event.pos().x(), event.pos().y()))
+
+    def mousePressEvent(self, event):
+        self.press_pos = event.pos()
+        self.drag_pos = None
+
+    def mouseMoveEvent(self, event):
+        if not event.buttons() & Qt.LeftButton or self.press_pos is None:
+            return
+        if self.drag_pos is None:
+            if (event.pos() - self.press_pos).manhattanLength() < CLICK_DISTANCE:
+                return
+            self.drag_pos = self.press_pos
+        self.pan += (event.pos().x() - self.drag_pos.x(), event.pos().y() - self.drag_pos.y())
+        self.drag_pos = event.pos()
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        if event.button() != Qt.LeftButton or self.drag_pos is not None:
+            return
+        index = self.body_at(event.pos())
+        if index is not None:
+            self.clicked.emit(self.catalog.names[index])
+
+    def mouseDoubleClickEvent(self, event):
+        self.drag_pos = event.pos()  # отпускание кнопки после двойного щелчка - не нажатие на тело
+        self.fit()
@@ -0,0 +1,135 @@
+"""Генератор синтетической базы astro-project.db заданного размера для нагрузочных замеров.
+
+Запуск: python -m benchmarks.catalog bench.db [--users 200] [--news 5000] [--systems 100] [--objects 8] [--seed 1]"""
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import time
+from werkzeug.security import generate_password_hash
+from data import db_session
+from data.news import News
+from data.space_objects import SpaceObject
+from data.space_systems import SpaceSystem
+from data.users import User
+
+PASSWORD = 'benchmark'  # пароль всех сгенерированных пользователей
+BATCH_SIZE = 1000  # строк в одном executemany
+WORDS = ('звезда', 'планета', 'орбита', 'галактика', 'туманность', 'комета', 'астероид', 'спутник',
+         'телескоп', 'наблюдение', 'затмение', 'метеор', 'созвездие', 'квазар', 'пульсар', 'экзопланета',
+         'атмосфера', 'кольца', 'гравитация', 'светимость', 'спектр', 'скопление', 'сверхновая', 'карлик')
+GALAXIES = ('Млечный путь', 'Андромеда', 'Треугольник', 'Большое Магелланово Облако', 'Сомбреро')
+ATMOSPHERES = ('Азот, кислород', 'Углекислый газ', 'Водород, гелий', 'Метан, аммиак', 'Отсутствует')
+
+
+def text(rng, words):
+    """Случайный текст из астрономических слов"""
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def make_users(rng, count):
+    """Пользователи user1..userN с общим паролем PASSWORD"""
+    hashed_password = generate_password_hash(PASSWORD)  # хэширование медленное - один раз на всех
+    now = datetime.datetime.now()
+    return [{'id': i, 'username': f'user{i}', 'name': f'Имя{i}', 'surname': f'Фамилия{i}',
+             'age': rng.randint(14, 80), 'about': text(rng, 8), 'email': f'user{i}@example.com',
+             'hashed_password': hashed_password, 'created_date': now - datetime.timedelta(days=rng.randint(0, 900))}
+            for i in range(1, count + 1)]
+
+
+def make_news(rng, count, users):
+    """Записи, равномерно распределённые по последнему году, пятая часть - личные"""
+    now = datetime.datetime.now()
+    return [{'id': i, 'title': text(rng, 4), 'content': text(rng, rng.randint(20, 120)),
+             'created_date': now - datetime.timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+             'is_private': rng.random() < 0.2, 'user_id': rng.randint(1, users)}
+            for i in range(1, count + 1)]
+
+
+def make_systems(rng, count, users):
+    """Звёздные системы; первая - Солнечная (у неё особая роль на странице базы данных)"""
+    now = datetime.datetime.now()
+    return [{'id': i, 'name': 'Солнечная система' if i == 1 else f'Система {i}',
+             'galaxy': GALAXIES[0] if i == 1 else rng.choice(GALAXIES), 'about': text(rng, 30),
+             'creator': 1 if i == 1 else rng.randint(1, users),
+             'created_date': now - datetime.timedelta(days=rng.randint(0, 900))}
+            for i in range(1, count + 1)]
+
+
+def make_objects(rng, systems, per_system, users):
+    """Звезда и планеты каждой системы с правдоподобными орбитами.
+
+    radius - большая полуось (а.е., логравномерно), period - по третьему закону Кеплера (годы),
+    ex - эксцентриситет (распределение Рэлея), m - масса (массы Земли, логнормально), v - орбитальная скорость (км/с)."""
+    now = datetime.datetime.now()
+    objects = []
+    for system in systems:
+        star_mass = rng.lognormvariate(0, 0.4)  # массы Солнца
+        objects.append({'name': f'Звезда {system["id"]}', 'space_type': 'Звезда', 'radius': 0, 'period': 0,
+                        'ex': 0, 'v': 0, 'p': round(rng.uniform(0.5, 2.5), 2), 'g': round(274 * star_mass, 1),
+                        'm': round(333000 * star_mass), 'sputnik': 0, 'atmosphere': 'Водород, гелий',
+                        'about': text(rng, 20), 'system': system['id'], 'creator': system['creator'],
+                        'created_date': now})
+        for number in range(1, per_system + 1):
+            a = math.exp(rng.uniform(math.log(0.05), math.log(50)))
+            mass = rng.lognormvariate(0, 2)
+            density = rng.uniform(3.5, 6) if mass < 10 else rng.uniform(0.6, 1.8)  # каменные и газовые
+            radius_earth = (mass * 5.5 / density) ** (1 / 3)
+            objects.append({
+                'name': f'Планета {system["id"]}-{number}',
+                'space_type': 'Планета' if mass > 0.01 else 'Карликовая планета',
+                'radius': round(a, 3), 'period': round(math.sqrt(a ** 3 / star_mass), 3),
+                'ex': round(min(rng.weibullvariate(0.07, 2), 0.9), 3),
+                'v': round(29.8 * math.sqrt(star_mass / a), 1), 'p': round(density, 1),
+                'g': round(9.8 * mass / radius_earth ** 2, 1), 'm': round(mass, 3),
+                'sputnik': min(int(rng.expovariate(1 / (1 + mass ** 0.5))), 100),
+                'atmosphere': rng.choice(ATMOSPHERES), 'about': text(rng, 20),
+                'system': system['id'], 'creator': rng.randint(1, users), 'created_date': now})
+    return objects
+
+
+def insert(connection, table, rows):
+    """Вставка строк пачками"""
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(table.insert(), rows[start:start + BATCH_SIZE])
+
+
+def generate(path, users=200, news=5000, systems=100, objects=8, seed=1):
+    """Создание базы: схема приложения (с индексами и полнотекстовым поиском) и синтетические данные"""
+    if os.path.exists(path):
+        raise SystemExit(f'{path} уже существует')
+    started = time.perf_counter()
+    rng = random.Random(seed)  # одинаковые параметры - одинаковая база
+    db_session.global_init(path)
+    engine = db_session.create_session().get_bind()
+    user_rows = make_users(rng, users)
+    system_rows = make_systems(rng, systems, users)
+    with engine.begin() as connection:
+        insert(connection, User.__table__, user_rows)
+        insert(connection, SpaceSystem.__table__, system_rows)
+        insert(connection, SpaceObject.__table__, make_objects(rng, system_rows, objects, users))
+        insert(connection, News.__table__, make_news(rng, news, users))
+    db_session.remove_session()
+    engine.dispose()
+    return {'path': path, 'users': users, 'news': news, 'systems': systems,
+            'objects': systems * (objects + 1), 'seed': seed, 'seconds': round(time.perf_counter() - started, 2)}
+
+
+def main():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description='Синтетическая база AstroCat')
+    parser.add_argument('path')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--news', type=int, default=5000)
+    parser.add_argument('--systems', type=int, default=100)
+    parser.add_argument('--objects', type=int, default=8, help='планет в каждой системе')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(generate(args.path, args.users, args.news, args.systems, args.objects, args.seed),
+                     ensure_ascii=False, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+"""Нагрузочный замер: все GET-страницы и ресурсы api на синтетической базе (см. benchmarks.catalog).
+
+Каждый маршрут нагружается отдельно, заданным числом запросов из нескольких потоков; результат -
+задержки p50/p95/p99 и пропускная способность по каждому маршруту в json. Запросы идут через тестовый
+клиент WSGI (без сети) и/или через настоящий сервер gunicorn. Изменяющие данные маршруты
+(POST, /delete_*, /logout, импорт) не нагружаются - иначе повторный запуск шёл бы на другой базе.
+
+Запуск: python -m benchmarks.load bench.db [--mode wsgi|server|both] [--requests 200] [--concurrency 8]
+        [--workers 2] [--seed 1] [--out result.json] [--baseline baseline.json] [--tolerance 0.25]"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from http.cookies import SimpleCookie
+from benchmarks.catalog import PASSWORD
+
+SAMPLES = 50  # сколько разных значений параметра перебирает маршрут вида /space_object/<name>
+LOGIN = 'user1'  # под этим пользователем запрашиваются страницы, требующие авторизации; id 1 - администратор
+SEARCH_QUERY = 'орбита'
+SERVER_START_TIMEOUT = 60  # ожидание запуска gunicorn, с
+SERVER_LOG = os.path.join(tempfile.gettempdir(), 'astrocat-bench-server.log')  # журнал gunicorn
+CSRF_TOKEN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+
+def sample(db, sql, rng, *params):
+    """Случайные значения из базы для подстановки в адрес"""
+    values = [row[0] for row in db.execute(sql, params)]
+    return rng.sample(values, min(SAMPLES, len(values))) or [0]
+
+
+def make_targets(db_file, seed):
+    """Маршруты и адреса, по которым они нагружаются: {маршрут: (требуется вход, [адреса])}"""
+    rng = random.Random(seed)
+    db = sqlite3.connect(db_file)
+    user_ids = sample(db, 'SELECT id FROM users', rng)
+    usernames = sample(db, 'SELECT username FROM users', rng)
+    news_ids = sample(db, 'SELECT id FROM news', rng)
+    own_news_ids = sample(db, 'SELECT news.id FROM news JOIN users ON users.id = news.user_id '
+                              'WHERE users.username = ?', rng, LOGIN)
+    system_ids = sample(db, 'SELECT id FROM space_systems', rng)
+    object_ids = sample(db, 'SELECT id FROM space_objects', rng)
+    object_names = [urllib.parse.quote(name) for name in sample(db, 'SELECT name FROM space_objects', rng)]
+    db.close()
+    search = urllib.parse.quote(SEARCH_QUERY)
+    return {
+        # страницы
+        '/': (False, ['/']),
+        '/ (login)': (True, ['/']),
+        '/database': (False, ['/database']),
+        '/search': (False, [f'/search?q={search}']),
+        '/space_object/<name>': (False, [f'/space_object/{name}' for name in object_names]),
+        '/user/<username>': (False, [f'/user/{name}' for name in usernames]),
+        '/register': (False, ['/register']),
+        '/login': (False, ['/login']),
+        '/add_news': (True, ['/add_news']),
+        '/edit_news/<id>': (True, [f'/edit_news/{news_id}' for news_id in own_news_ids]),
+        '/add_system': (True, ['/add_system']),
+        '/edit_system/<id>': (True, [f'/edit_system/{system_id}' for system_id in system_ids]),
+        '/add_space_object/<id>': (True, [f'/add_space_object/{system_id}' for system_id in system_ids]),
+        '/edit_space_object/<name>': (True, [f'/edit_space_object/{name}' for name in object_names]),
+        '/edit_user/<username>': (True, [f'/edit_user/{LOGIN}']),
+        '/cache_stats': (True, ['/cache_stats']),  # только для администратора
+        '/job_stats': (True, ['/job_stats']),
+        # api
+        '/api/users': (False, ['/api/users']),
+        '/api/users/<id>': (False, [f'/api/users/{user_id}' for user_id in user_ids]),
+        '/api/news': (False, ['/api/news']),
+        '/api/news/<id>': (False, [f'/api/news/{news_id}' for news_id in news_ids]),
+        '/api/space_objects': (False, ['/api/space_objects']),
+        '/api/space_objects/<id>': (False, [f'/api/space_objects/{object_id}' for object_id in object_ids]),
+        '/api/space_objects/export': (False, ['/api/space_objects/export']),
+        '/api/space_systems': (False, ['/api/space_systems']),
+        '/api/space_systems/<id>': (False, [f'/api/space_systems/{system_id}' for system_id in system_ids]),
+        '/api/space_systems/export': (False, ['/api/space_systems/export']),
+        '/api/space_systems/<id>/ephemeris': (False, [f'/api/space_systems/{system_id}/ephemeris?t1=10&step=0.01'
+                                                      for system_id in system_ids]),
+        '/api/search': (False, [f'/api/search?q={search}']),
+    }
+
+
+class WsgiClient:
+    """Запросы через тестовый клиент Flask: время самого приложения, без сети и сервера"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, url):
+        """GET-запрос, возвращает код ответа"""
+        response = self.client.get(url)
+        response.get_data()
+        return response.status_code
+
+    def post(self, url, data):
+        """POST формы, возвращает код ответа"""
+        return self.client.post(url, data=data).status_code
+
+
+class HttpClient:
+    """Запросы к настоящему серверу по постоянному соединению, с cookie"""
+
+    def __init__(self, base_url):
+        address = urllib.parse.urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(address.hostname, address.port)
+        self.cookies = SimpleCookie()
+
+    def request(self, method, url, body=None, headers=None):
+        """Запрос, возвращает код ответа и тело"""
+        headers = dict(headers or {})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{key}={morsel.value}' for key, morsel in self.cookies.items())
+        try:
+            self.connection.request(method, url, body, headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):  # сервер закрыл соединение (max_requests) - переподключаемся
+            self.connection.close()
+            self.connection.request(method, url, body, headers)
+            response = self.connection.getresponse()
+        data = response.read()
+        for header in response.headers.get_all('Set-Cookie') or ():
+            self.cookies.load(header)
+        return response.status, data
+
+    def get(self, url):
+        """GET-запрос, возвращает код ответа"""
+        return self.request('GET', url)[0]
+
+    def post(self, url, data):
+        """POST формы, возвращает код ответа"""
+        return self.request('POST', url, urllib.parse.urlencode(data),
+                            {'Content-Type': 'application/x-www-form-urlencoded'})[0]
+
+
+def login(client, page):
+    """Вход под LOGIN (page - html страницы /login с csrf-токеном формы)"""
+    match = CSRF_TOKEN.search(page)
+    data = {'login': LOGIN, 'password': PASSWORD}
+    if match:
+        data['csrf_token'] = match.group(1)
+    if client.post('/login', data) != 302 or client.get('/add_news') != 200:
+        raise SystemExit(f'Не удалось войти как {LOGIN}: база создана benchmarks.catalog?')
+
+
+def percentile(values, fraction):
+    """Процентиль отсортированного списка"""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_route(clients, urls, requests):
+    """Нагрузка одного маршрута: requests запросов, по потоку на клиента"""
+    counter = itertools.count()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(client):
+        while True:
+            number = next(counter)
+            if number >= requests:
+                return
+            started = time.perf_counter()
+            status = client.get(urls[number % len(urls)])
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {'requests': len(latencies), 'errors': len(errors),
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'rps': round(len(latencies) / wall, 1)}
+
+
+def run(make_client, targets, requests, concurrency):
+    """Нагрузка всех маршрутов; у анонимных и авторизованных потоков свои клиенты (и cookie)"""
+    anonymous = [make_client() for _ in range(concurrency)]
+    authorized = [make_client() for _ in range(concurrency)]
+    for client in authorized:
+        login(client, page_text(client, '/login'))
+    return {route: run_route(authorized if needs_login else anonymous, urls, requests)
+            for route, (needs_login, urls) in targets.items()}
+
+
+def page_text(client, url):
+    """Html страницы"""
+    if isinstance(client, WsgiClient):
+        return client.client.get(url).get_data(as_text=True)
+    return client.request('GET', url)[1].decode('utf-8')
+
+
+def run_wsgi(db_file, targets, requests, concurrency):
+    """Замер через тестовый клиент"""
+    import main
+    app = main.create_app(db_file)
+    return run(lambda: WsgiClient(app), targets, requests, concurrency)
+
+
+def free_port():
+    """Свободный локальный порт"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_server(db_file, targets, requests, concurrency, workers):
+    """Замер через gunicorn с настройками gunicorn.conf.py (журнал сервера - в SERVER_LOG)"""
+    port = free_port()
+    environment = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    with open(SERVER_LOG, 'w') as log:
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', f'main:create_app({db_file!r})'],
+                                  env=environment, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            if server.poll() is not None:
+                raise SystemExit(f'gunicorn не запустился, см. {SERVER_LOG}')
+            try:
+                HttpClient(base_url).get('/login')
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise SystemExit(f'gunicorn не ответил за отведённое время, см. {SERVER_LOG}')
+                time.sleep(0.2)
+        return run(lambda: HttpClient(base_url), targets, requests, concurrency)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(results, baseline, tolerance):
+    """Маршруты, ставшие медленнее базового замера больше чем на tolerance (по p95 или rps)"""
+    regressions = []
+    for mode, routes in results.items():
+        for route, current in routes.items():
+            previous = baseline.get(mode, {}).get(route)
+            if previous is None:
+                continue
+            if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance) or \
+                    current['rps'] < previous['rps'] * (1 - tolerance):
+                regressions.append({'mode': mode, 'route': route,
+                                    'p95_ms': [previous['p95_ms'], current['p95_ms']],
+                                    'rps': [previous['rps'], current['rps']]})
+    return regressions
+
+
+def main():
+    """Разбор аргументов, замер, сравнение с базовым результатом"""
+    parser = argparse.ArgumentParser(description='Нагрузочный замер AstroCat')
+    parser.add_argument('db_file', help='база, созданная python -m benchmarks.catalog')
+    parser.add_argument('--mode', choices=('wsgi', 'server', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=200, help='запросов на маршрут')
+    parser.add_argument('--concurrency', type=int, default=8, help='параллельных клиентов')
+    parser.add_argument('--workers', type=int, default=2, help='процессов gunicorn')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', help='куда сохранить результат (json)')
+    parser.add_argument('--baseline', help='результат прошлого замера для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='допустимое ухудшение, доля')
+    args = parser.parse_args()
+    targets = make_targets(args.db_file, args.seed)
+    results = {}
+    if args.mode in ('wsgi', 'both'):
+        results['wsgi'] = run_wsgi(args.db_file, targets, args.requests, args.concurrency)
+    if args.mode in ('server', 'both'):
+        results['server'] = run_server(args.db_file, targets, args.requests, args.concurrency, args.workers)
+    report = {'db_file': args.db_file, 'requests': args.requests, 'concurrency': args.concurrency,
+              'workers': args.workers, 'seed': args.seed, 'results': results}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            report['regressions'] = compare(results, json.load(file)['results'], args.tolerance)
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file:
+            file.write(text)
+    print(text)
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
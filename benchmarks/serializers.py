@@ -0,0 +1,47 @@
+"""Сравнение скорости сериализации: SerializerMixin.to_dict и data.serializers.Serializer.
+
+Запуск: python -m benchmarks.serializers [количество записей]"""
+import datetime
+import json
+import sys
+import timeit
+from data import __all_models
+from data.serializers import Serializer, orjson
+from data.space_objects import SpaceObject
+from data.users import User
+from data.space_object_resources import SPACE_OBJECT_FIELDS
+
+
+def make_objects(count):
+    """Космические объекты с создателями (без базы данных)"""
+    user = User(name='Астроном')
+    return [SpaceObject(name=f'Объект {i}', space_type='Планета', radius=i * 0.1, period=i * 0.3, ex=0.01,
+                        v=30, p=5, g=9.8, m=i, sputnik=i % 3, atmosphere='Азот', about='Описание',
+                        image_path=f'/static/img/{i}.png', created_date=datetime.datetime.now(), user=user)
+            for i in range(count)]
+
+
+def rows_per_second(function, count, repeat=5):
+    """Лучшая скорость из repeat запусков, записей в секунду"""
+    return count / min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main(count=10000):
+    """Запуск замеров и вывод результата в json"""
+    items = make_objects(count)
+    serializer = Serializer(SpaceObject, SPACE_OBJECT_FIELDS)
+    assert [item.to_dict(only=SPACE_OBJECT_FIELDS) for item in items[:10]] == serializer.many(items[:10])
+    results = {
+        'rows': count,
+        'to_dict': rows_per_second(lambda: [item.to_dict(only=SPACE_OBJECT_FIELDS) for item in items], count),
+        'serializer': rows_per_second(lambda: serializer.many(items), count),
+        'serializer+json': rows_per_second(lambda: json.dumps(serializer.many(items)), count),
+    }
+    if orjson is not None:
+        results['serializer+orjson'] = rows_per_second(lambda: orjson.dumps(serializer.many(items)), count)
+    results['speedup'] = results['serializer'] / results['to_dict']
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -3,3 +3,5 @@ from data import users
 from data import news
 from data import space_objects
 from data import space_systems
+from data import media_blobs
+from data import jobs
@@ -0,0 +1,21 @@
+import functools
+from flask import abort
+from flask_login import current_user, login_required
+
+ADMIN_ID = 1  # администратор сайта - первый пользователь (как и в шаблонах: current_user.id == 1)
+
+
+def is_admin(user):
+    """Является ли пользователь администратором"""
+    return user.is_authenticated and user.id == ADMIN_ID
+
+
+def admin_required(view):
+    """Служебная страница только для администратора: гостям - 401 (login_view не задан), остальным - 403"""
+    @functools.wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if not is_admin(current_user):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
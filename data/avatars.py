@@ -0,0 +1,161 @@
+import colorsys
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from flask import abort, make_response, url_for
+from PIL import Image, ImageDraw
+from data import db_session
+from data.metrics import timed
+from data.users import User
+
+AVATAR_SIZES = (28, 48, 300)  # размеры, которые используются в шаблонах, px
+AVATAR_VERSION = 1  # меняется вместе с алгоритмом рисования, чтобы браузеры забыли старые картинки
+AVATAR_FOLDER = 'cache/avatars'  # дисковый кэш
+MEMORY_ENTRIES = 1024  # сколько картинок держать в памяти
+DISK_ENTRIES = 30000  # сколько картинок держать на диске; лишние, давно не читанные, удаляются
+TRIM_EVERY = 100  # проверка размера дискового кэша после стольких новых картинок
+GRID = 5  # клеток по стороне; левая половина зеркалится на правую
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def identicon(text, size):
+    """PNG-аватарка: симметричный узор и цвет однозначно определяются хэшем текста"""
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    hue = digest[0] / 255
+    foreground = tuple(round(channel * 255) for channel in colorsys.hls_to_rgb(hue, 0.55, 0.6))
+    background = (240, 240, 240)
+    image = Image.new('RGB', (size, size), background)
+    draw = ImageDraw.Draw(image)
+    padding = size // 10
+    cell = (size - 2 * padding) / GRID
+    half = (GRID + 1) // 2
+    for index in range(GRID * half):
+        if digest[1 + index] % 2:
+            continue
+        row, column = divmod(index, half)
+        for x in {column, GRID - 1 - column}:
+            left, top = padding + x * cell, padding + row * cell
+            draw.rectangle((round(left), round(top), round(left + cell) - 1, round(top + cell) - 1), fill=foreground)
+    output = io.BytesIO()
+    image.save(output, 'PNG', optimize=True)
+    return output.getvalue()
+
+
+class Avatars:
+    """Аватарки пользователей: рисуются на сервере при первом запросе, кэшируются на диске и в памяти.
+
+    Рисуются только для существующих логинов и разрешённых размеров, а дисковый кэш ограничен
+    DISK_ENTRIES файлами - произвольными адресами нельзя занять диск и процессор."""
+
+    def __init__(self, app=None, folder=AVATAR_FOLDER):
+        self.folder = folder
+        self._memory = OrderedDict()  # (текст, размер) -> png
+        self._inflight = {}  # (текст, размер) -> Event: картинку уже рисует другой поток
+        self._lock = threading.Lock()
+        self.generated = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Маршрут /avatar/<size>/<text> и глобальная переменная avatars в шаблонах"""
+        app.add_url_rule('/avatar/<int:size>/<path:text>', 'avatar', self.serve)
+        app.jinja_env.globals['avatars'] = self
+
+    def identicon(self, text, size=48):
+        """Адрес аватарки для шаблонов"""
+        return url_for('avatar', size=size, text=text, v=AVATAR_VERSION)
+
+    @staticmethod
+    def exists(username):
+        """Есть ли пользователь с таким логином"""
+        return db_session.create_session().query(User.id).filter(User.username == username).first() is not None
+
+    def get(self, text, size):
+        """PNG аватарки: из памяти, с диска или нарисованная (один раз на ключ, даже при параллельных запросах);
+        None, если пользователя с таким логином нет"""
+        key = (text, size)
+        while True:
+            with self._lock:
+                data = self._memory.get(key)
+                if data is not None:
+                    self._memory.move_to_end(key)
+                    return data
+                waiting = self._inflight.get(key)
+                if waiting is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            waiting.wait()  # картинку рисует другой запрос - ждём и берём её из памяти
+        try:
+            if not self.exists(text):
+                return None
+            data = self._load(text, size)
+            with self._lock:
+                self._memory[key] = data
+                while len(self._memory) > MEMORY_ENTRIES:
+                    self._memory.popitem(last=False)
+            return data
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def serve(self, size, text):
+        """Отдача аватарки; адрес зависит только от текста, размера и версии - кэшируется навсегда"""
+        if size not in AVATAR_SIZES:
+            abort(404)
+        data = self.get(text, size)
+        if data is None:
+            abort(404)
+        response = make_response(data)
+        response.mimetype = 'image/png'
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    def _load(self, text, size):
+        """Чтение с диска или рисование с сохранением на диск"""
+        name = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = os.path.join(self.folder, f'v{AVATAR_VERSION}', str(size), f'{name}.png')
+        with timed('file'):
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    data = file.read()
+                os.utime(path)  # время изменения - время последнего чтения: по нему вытесняются старые
+                return data
+        data = identicon(text, size)
+        with timed('file'):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{threading.get_ident()}.part'
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)  # другие процессы не увидят недописанный файл
+        with self._lock:
+            self.generated += 1
+            trim = self.generated % TRIM_EVERY == 0
+        if trim:
+            self.trim()
+        return data
+
+    def trim(self, limit=DISK_ENTRIES):
+        """Удаление с диска давно не читанных картинок сверх limit"""
+        files = []
+        for folder, _, names in os.walk(self.folder):
+            for name in names:
+                path = os.path.join(folder, name)
+                try:
+                    files.append((os.stat(path).st_mtime, path))
+                except FileNotFoundError:  # файл удалил другой процесс
+                    continue
+        if len(files) <= limit:
+            return 0
+        files.sort()
+        removed = 0
+        for _, path in files[:len(files) - limit]:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
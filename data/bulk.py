@@ -0,0 +1,93 @@
+import datetime
+import json
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from data import db_session
+from data.page_cache import page_cache
+
+EXPORT_CHUNK_SIZE = 1000  # строк, читаемых из базы за раз
+IMPORT_BATCH_SIZE = 1000  # строк в одной транзакции при импорте
+
+
+def export_lines(model):
+    """Построчная выгрузка таблицы модели в формате NDJSON (одна запись - одна строка json)"""
+    table = model.__table__
+    engine = db_session.create_session().get_bind()
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(
+            select(table).order_by(table.c.id)).yield_per(EXPORT_CHUNK_SIZE).mappings()
+        for row in result:
+            yield json.dumps({key: value.isoformat() if isinstance(value, datetime.datetime) else value
+                              for key, value in row.items()}, ensure_ascii=False) + '\n'
+
+
+def import_lines(model, lines, batch_size=IMPORT_BATCH_SIZE):
+    """Загрузка записей модели из строк NDJSON пачками по batch_size строк в транзакции.
+
+    Возвращает количество добавленных записей и список ошибок по строкам."""
+    table = model.__table__
+    engine = db_session.create_session().get_bind()
+    inserted, errors, batch = 0, [], []
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        if not line.strip():
+            continue
+        try:
+            batch.append((number, parse_row(table, json.loads(line))))
+        except (ValueError, TypeError) as error:
+            errors.append({'line': number, 'error': str(error)})
+        if len(batch) >= batch_size:
+            inserted += insert_batch(engine, table, batch, errors)
+            batch = []
+    if batch:
+        inserted += insert_batch(engine, table, batch, errors)
+    if inserted:
+        page_cache.invalidate('database')  # новые записи видны только на странице базы данных
+    return inserted, sorted(errors, key=lambda error: error['line'])
+
+
+def parse_row(table, data):
+    """Проверка строки и приведение её к полному набору столбцов таблицы"""
+    if not isinstance(data, dict):
+        raise ValueError('Line must contain a json object')
+    unknown = set(data) - set(table.c.keys())
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(sorted(unknown))}')
+    if not data.get('name'):
+        raise ValueError('Field name is required')
+    row = {}
+    for column in table.columns:
+        value = data.get(column.key)
+        python_type = column.type.python_type
+        if value is None:
+            if column.key == 'created_date':
+                value = datetime.datetime.now()
+        elif python_type is datetime.datetime:
+            value = datetime.datetime.fromisoformat(value)
+        elif python_type is int:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f'Field {column.key} must be a number')
+        elif python_type is str and not isinstance(value, str):
+            raise ValueError(f'Field {column.key} must be a string')
+        row[column.key] = value
+    return row
+
+
+def insert_batch(engine, table, batch, errors):
+    """Вставка пачки одним executemany; при ошибке - построчно, чтобы найти виноватые строки"""
+    try:
+        with engine.begin() as connection:
+            connection.execute(table.insert(), [row for number, row in batch])
+        return len(batch)
+    except SQLAlchemyError:
+        pass
+    inserted = 0
+    for number, row in batch:
+        try:
+            with engine.begin() as connection:
+                connection.execute(table.insert(), row)
+            inserted += 1
+        except SQLAlchemyError as error:
+            errors.append({'line': number, 'error': str(error.orig if hasattr(error, 'orig') else error)})
+    return inserted
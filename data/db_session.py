@@ -1,16 +1,48 @@
+import threading
 import sqlalchemy as sa
 import sqlalchemy.orm as orm
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
 import sqlalchemy.ext.declarative as dec
+from flask import g, has_app_context
+from data.metrics import instrument_engine
 
 SqlAlchemyBase = dec.declarative_base()
 
 __factory = None
+__engine = None
+
+POOL_SIZE = 5  # постоянные соединения в пуле
+POOL_MAX_OVERFLOW = 10  # дополнительные соединения при пиковой нагрузке
+POOL_TIMEOUT = 10  # ожидание свободного соединения, с
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),  # читатели не блокируются писателем
+    ('synchronous', 'NORMAL'),  # в режиме WAL безопасно и намного быстрее FULL
+    ('mmap_size', 268435456),  # 256 МБ файла базы читаются через mmap
+    ('cache_size', -65536),  # 64 МБ кэша страниц на соединение
+    ('busy_timeout', 5000),  # ожидание блокировки вместо ошибки "database is locked", мс
+    ('temp_store', 'MEMORY'),  # временные таблицы и индексы в памяти
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Настройка каждого нового соединения с SQLite"""
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def _scope():
+    """Область сессии: контекст приложения Flask, а вне его - текущий поток"""
+    if has_app_context():
+        return id(g._get_current_object())
+    return threading.get_ident()
 
 
 def global_init(db_file):
     """Объявление базы данных"""
-    global __factory
+    global __factory, __engine
 
     if __factory:
         return
@@ -21,15 +53,37 @@ def global_init(db_file):
     conn_str = f'sqlite:///{db_file.strip()}?check_same_thread=False'
     print(f"Подключение к базе данных по адресу {conn_str}")
 
-    engine = sa.create_engine(conn_str, echo=False)
-    __factory = orm.sessionmaker(bind=engine)
+    engine = sa.create_engine(conn_str, echo=False, poolclass=QueuePool, pool_size=POOL_SIZE,
+                              max_overflow=POOL_MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    sa.event.listen(engine, 'connect', _set_sqlite_pragmas)
+    instrument_engine(engine)  # количество и время запросов к базе в /metrics и Server-Timing
+    from data.slow_queries import slow_query_log
+    slow_query_log.watch(engine)  # журнал медленных запросов (включается настройкой SLOW_QUERY_MS)
+    __engine = engine
+    __factory = orm.scoped_session(orm.sessionmaker(bind=engine), scopefunc=_scope)
 
     from data import __all_models
+    from data.search import create_search_index
 
     SqlAlchemyBase.metadata.create_all(engine)
+    create_search_index(engine)  # полнотекстовый поиск (FTS5)
 
 
 def create_session() -> Session:
-    """Создание сессии"""
+    """Создание сессии (в пределах одного запроса возвращается одна и та же сессия)"""
     global __factory
     return __factory()
+
+
+def remove_session():
+    """Закрытие сессии текущего запроса и возврат соединения в пул"""
+    global __factory
+    if __factory:
+        __factory.remove()
+
+
+def dispose_engine():
+    """Сброс пула соединений в дочернем процессе после fork (соединения родителя не закрываются)"""
+    global __engine
+    if __engine:
+        __engine.dispose(close=False)
@@ -0,0 +1,92 @@
+import numpy as np
+
+KEPLER_TOLERANCE = 1e-10  # точность решения уравнения Кеплера, рад
+KEPLER_MAX_ITERATIONS = 10  # после начального приближения Ньютону-Галлею хватает 1-2 итераций
+MAX_ECCENTRICITY = 0.99  # эллиптические орбиты; e >= 1 (параболы, гиперболы) не поддерживаются
+CHUNK_POINTS = 16384  # сколько точек считается за раз: временные массивы остаются в кэше процессора
+ROTATION_LIMIT = 1e-2  # поправки меньше этой пересчитывают sin и cos рядом Тейлора, а не заново
+# коэффициенты начального приближения Markley (1995)
+STARTER_ALPHA = 3 * np.pi ** 2 / (np.pi ** 2 - 6)
+STARTER_ALPHA_M = 1.6 * np.pi / (np.pi ** 2 - 6)
+
+
+def time_grid(t0, t1, step):
+    """Моменты t0, t0 + step, ... <= t1 (годы)"""
+    count = int(np.floor((t1 - t0) / step + 1e-9)) + 1
+    return t0 + step * np.arange(count, dtype=np.float64)
+
+
+def orbital_elements(a, period, e):
+    """Массивы элементов орбит из значений полей объектов (None - нет значения).
+
+    Если период не указан, он берётся из третьего закона Кеплера для звезды в одну массу Солнца."""
+    a = np.maximum(np.nan_to_num(np.asarray(a, dtype=np.float64)), 0)
+    period = np.nan_to_num(np.asarray(period, dtype=np.float64))
+    e = np.clip(np.nan_to_num(np.asarray(e, dtype=np.float64)), 0, MAX_ECCENTRICITY)
+    period = np.where(period > 0, period, a ** 1.5)
+    return a, period, e
+
+
+def _starter(mean_anomaly, e):
+    """Начальное приближение эксцентрической аномалии с точностью ~1e-3 без тригонометрии (M в [-pi, pi])"""
+    alpha = STARTER_ALPHA + STARTER_ALPHA_M * (np.pi - np.abs(mean_anomaly)) / (1 + e)
+    d = 3 * (1 - e) + alpha * e
+    m2 = mean_anomaly * mean_anomaly
+    q = 2 * alpha * d * (1 - e) - m2
+    r = (3 * alpha * d * (d - 1 + e) + m2) * mean_anomaly
+    w = np.cbrt(np.abs(r) + np.sqrt(q * q * q + r * r))
+    w *= w
+    return (2 * r * w / (w * w + w * q + q * q) + mean_anomaly) / d
+
+
+def _rotate(sin_e, cos_e, delta):
+    """sin и cos угла, увеличенного на малую поправку delta (ряд Тейлора до delta^6)"""
+    delta2 = delta * delta
+    sin_d = delta * (1 - delta2 / 6 * (1 - delta2 / 20))
+    cos_d = 1 - delta2 / 2 * (1 - delta2 / 12 * (1 - delta2 / 30))
+    return sin_e * cos_d + cos_e * sin_d, cos_e * cos_d - sin_e * sin_d
+
+
+def solve_kepler(mean_anomaly, e):
+    """Решение уравнения Кеплера E - e sin E = M сразу для всего массива: (E, sin E, cos E).
+
+    Итерации Ньютона-Галлея от начального приближения Markley; sin и cos считаются один раз,
+    дальше поправляются вместе с E, поэтому координаты тел не требуют ещё одного вызова sin и cos."""
+    mean_anomaly = np.remainder(mean_anomaly + np.pi, 2 * np.pi) - np.pi
+    anomaly = _starter(mean_anomaly, e)
+    sin_e, cos_e = np.sin(anomaly), np.cos(anomaly)
+    for _ in range(KEPLER_MAX_ITERATIONS):
+        e_sin = e * sin_e
+        residual = anomaly - e_sin - mean_anomaly
+        derivative = 1 - e * cos_e
+        delta = residual / (0.5 * residual * e_sin / derivative - derivative)
+        anomaly += delta
+        largest = np.abs(delta).max(initial=0)
+        if largest < ROTATION_LIMIT:
+            sin_e, cos_e = _rotate(sin_e, cos_e, delta)
+        else:
+            sin_e, cos_e = np.sin(anomaly), np.cos(anomaly)
+        if largest < KEPLER_TOLERANCE:
+            break
+    return anomaly, sin_e, cos_e
+
+
+def positions(a, period, e, times):
+    """Координаты тел в плоскости орбиты (а.е.) в моменты times (годы): массив (тела, моменты, 2).
+
+    Звезда в начале координат, перицентр на оси x, в момент 0 каждое тело в перицентре.
+    Тела без орбиты (a = 0, например сама звезда) остаются в начале координат.
+    Считается блоками тел по CHUNK_POINTS точек, внутри блока - без циклов по телам и моментам."""
+    a, period, e = orbital_elements(a, period, e)
+    times = np.asarray(times, dtype=np.float64)
+    mean_motion = np.divide(2 * np.pi, period, out=np.zeros_like(period), where=period > 0)
+    semi_minor = a * np.sqrt(1 - e * e)
+    result = np.empty((len(a), len(times), 2), dtype=np.float64)
+    rows = max(1, CHUNK_POINTS // max(1, len(times)))
+    for start in range(0, len(a), rows):
+        block = slice(start, start + rows)
+        e_block = e[block, None]
+        anomaly, sin_e, cos_e = solve_kepler(mean_motion[block, None] * times, e_block)
+        result[block, :, 0] = a[block, None] * (cos_e - e_block)
+        result[block, :, 1] = semi_minor[block, None] * sin_e
+    return result
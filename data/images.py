@@ -0,0 +1,65 @@
+import os
+from flask import current_app
+from PIL import Image, ImageOps
+
+STATIC_FOLDER = 'static'
+VARIANT_WIDTHS = (320, 640, 1280)  # ширины уменьшенных копий, px
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def make_variants(filename):
+    """Создание уменьшенных копий и WebP для изображения static/<filename>.
+
+    Копии шире оригинала не создаются. Возвращает (srcset оригинального формата, srcset WebP)."""
+    path = os.path.join(STATIC_FOLDER, filename)
+    stem, ext = os.path.splitext(filename)
+    srcset, srcset_webp = [], []
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)  # фото с телефона бывают повёрнуты через EXIF
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        widths = [width for width in VARIANT_WIDTHS if width < image.width]
+        for width in widths:
+            variant = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            save(variant, f'{stem}-{width}{ext}')
+            save(variant, f'{stem}-{width}.webp')
+            srcset.append((f'{stem}-{width}{ext}', width))
+            srcset_webp.append((f'{stem}-{width}.webp', width))
+        save(image, f'{stem}.webp')
+        srcset.append((filename, image.width))
+        srcset_webp.append((f'{stem}.webp', image.width))
+    return format_srcset(srcset), format_srcset(srcset_webp)
+
+
+def save(image, filename):
+    """Сохранение изображения с настройками сжатия по формату файла"""
+    path = os.path.join(STATIC_FOLDER, filename)
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.webp':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif ext in ('.jpg', '.jpeg'):
+        image.convert('RGB').save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(path, optimize=True)
+
+
+def format_srcset(items):
+    """Строка srcset из пар (файл в static, ширина)"""
+    return ', '.join(f'{current_app.static_url_path}/{filename} {width}w' for filename, width in items)
+
+
+def image_files(path, *srcsets):
+    """Пути на диске ко всем файлам изображения: оригиналу и копиям из srcset"""
+    urls = [path] if path else []
+    for srcset in srcsets:
+        urls += [item.strip().split(' ')[0] for item in (srcset or '').split(',') if item.strip()]
+    return list(dict.fromkeys(url[1:] for url in urls))  # '/static/...' -> 'static/...'
+
+
+def remove_image(path, *srcsets):
+    """Удаление оригинала изображения и всех его копий"""
+    for file in image_files(path, *srcsets):
+        if os.path.exists(file):
+            os.remove(file)
@@ -0,0 +1,221 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import threading
+from collections import deque
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from data import db_session
+from data.jobs import Job
+
+JOB_WORKERS = 2  # потоков-исполнителей в процессе
+POLL_INTERVAL = 1.0  # как часто проверять отложенные задачи, с
+MAX_ATTEMPTS = 5  # после стольких ошибок задача помечается failed
+JOB_LEASE = datetime.timedelta(minutes=5)  # задача в статусе running дольше этого считается брошенной
+LATENCY_WINDOW = 1000  # по скольким последним задачам считается статистика задержек
+
+handlers = {}  # тип задачи -> обработчик(db_sess, **payload)
+logger = logging.getLogger(__name__)
+
+
+def job(kind):
+    """Декоратор: регистрация обработчика задачи"""
+
+    def decorator(handler):
+        handlers[kind] = handler
+        return handler
+
+    return decorator
+
+
+def enqueue(db_sess, kind, delay=None, **payload):
+    """Постановка задачи в очередь в той же транзакции, что и изменения, которые её породили"""
+    now = datetime.datetime.now()
+    db_sess.add(Job(kind=kind, payload=json.dumps(payload), created_date=now,
+                    run_at=now + (delay or datetime.timedelta())))
+    db_sess.info['jobs_enqueued'] = True
+
+
+def percentile(values, fraction):
+    """Процентиль списка значений (None для пустого списка)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class JobQueue:
+    """Очередь фоновых задач: задачи хранятся в таблице jobs, выполняются пулом потоков"""
+
+    def __init__(self, app=None, workers=JOB_WORKERS):
+        self.app = None
+        self.workers = workers
+        self._threads = []
+        self._pid = None  # процесс, в котором запущены исполнители (после fork их нужно запускать заново)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.processed = self.failed = self.retried = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # (ожидание в очереди, выполнение), с
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Подключение к приложению: исполнители запускаются первым запросом в каждом процессе"""
+        self.app = app
+        app.before_request(self._ensure_started)
+
+    def _ensure_started(self):
+        """Запуск исполнителей, если в этом процессе их ещё нет"""
+        if self._pid != os.getpid():
+            self.start()
+
+    def start(self):
+        """Запуск потоков-исполнителей"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = []  # потоки родительского процесса после fork не существуют
+            self._stop.clear()
+            self.reclaim()
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        """Остановка исполнителей; начатые задачи дорабатывают, остальные дождутся следующего запуска"""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def wake(self):
+        """Сигнал исполнителям: появились новые задачи"""
+        self._wake.set()
+
+    def reclaim(self):
+        """Возврат в очередь задач, брошенных остановленным процессом"""
+        with self.app.app_context():
+            db_sess = db_session.create_session()
+            db_sess.query(Job).filter(Job.status == 'running',
+                                      Job.started_date < datetime.datetime.now() - JOB_LEASE).update(
+                {Job.status: 'pending'}, synchronize_session=False)
+            db_sess.commit()
+
+    def run_pending(self):
+        """Выполнение всех готовых задач в текущем потоке, возвращает их количество"""
+        count = 0
+        while self.run_one():
+            count += 1
+        return count
+
+    def run_one(self):
+        """Выполнение одной готовой задачи; False, если таких нет"""
+        with self.app.app_context():
+            db_sess = db_session.create_session()
+            claimed = self._claim(db_sess)
+            if claimed is None:
+                return False
+            job_id, kind, payload, attempts, run_at = claimed
+            started = datetime.datetime.now()
+            try:
+                handlers[kind](db_sess, **json.loads(payload))
+                db_sess.query(Job).filter(Job.id == job_id).delete(synchronize_session=False)
+                db_sess.commit()  # выполненная задача удаляется вместе с её изменениями
+            except Exception as error:
+                db_sess.rollback()
+                logger.exception('Задача %s (%s) завершилась ошибкой', job_id, kind)
+                self._fail(db_sess, job_id, attempts, error)
+                return True
+            finished = datetime.datetime.now()
+            with self._lock:
+                self.processed += 1
+                self.latencies.append(((started - run_at).total_seconds(), (finished - started).total_seconds()))
+            return True
+
+    def _claim(self, db_sess):
+        """Захват готовой задачи условным UPDATE: одну задачу не возьмут два исполнителя или процесса"""
+        now = datetime.datetime.now()
+        while True:
+            candidate = db_sess.query(Job.id).filter(Job.status == 'pending', Job.run_at <= now).order_by(
+                Job.run_at, Job.id).first()
+            if candidate is None:
+                return None
+            claimed = db_sess.query(Job).filter(Job.id == candidate.id, Job.status == 'pending').update(
+                {Job.status: 'running', Job.started_date: now, Job.attempts: Job.attempts + 1},
+                synchronize_session=False)
+            db_sess.commit()
+            if claimed:
+                item = db_sess.query(Job).get(candidate.id)
+                return item.id, item.kind, item.payload, item.attempts, item.run_at
+
+    def _fail(self, db_sess, job_id, attempts, error):
+        """Повтор задачи с растущей паузой или пометка failed после MAX_ATTEMPTS попыток"""
+        values = {Job.error: f'{type(error).__name__}: {error}'}
+        if attempts >= MAX_ATTEMPTS:
+            values[Job.status] = 'failed'
+        else:
+            values[Job.status] = 'pending'
+            values[Job.run_at] = datetime.datetime.now() + datetime.timedelta(seconds=2 ** attempts)
+        db_sess.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+        db_sess.commit()
+        with self._lock:
+            if attempts >= MAX_ATTEMPTS:
+                self.failed += 1
+            else:
+                self.retried += 1
+
+    def _work(self):
+        """Цикл исполнителя"""
+        while not self._stop.is_set():
+            try:
+                ran = self.run_one()
+            except Exception:  # например, база недоступна - повторим после паузы
+                logger.exception('Ошибка очереди задач')
+                ran = False
+            if not ran:
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+
+    def stats(self):
+        """Глубина очереди и задержки выполнения задач"""
+        with self.app.app_context():
+            db_sess = db_session.create_session()
+            now = datetime.datetime.now()
+            depth = dict(db_sess.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+            ready, oldest = db_sess.query(func.count(Job.id), func.min(Job.run_at)).filter(
+                Job.status == 'pending', Job.run_at <= now).one()
+        with self._lock:
+            waits = [wait for wait, run in self.latencies]
+            runs = [run for wait, run in self.latencies]
+            return {'pending': depth.get('pending', 0), 'ready': ready,
+                    'running': depth.get('running', 0), 'failed_total': depth.get('failed', 0),
+                    'oldest_ready_age': (now - oldest).total_seconds() if oldest else 0.0,
+                    'processed': self.processed, 'failed': self.failed, 'retried': self.retried,
+                    'workers': len(self._threads),
+                    'wait_p50': percentile(waits, 0.5), 'wait_p95': percentile(waits, 0.95),
+                    'run_p50': percentile(runs, 0.5), 'run_p95': percentile(runs, 0.95),
+                    'run_max': max(runs, default=None)}
+
+
+job_queue = JobQueue()
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_workers(session):
+    """Новые задачи подтверждены - будим исполнителей"""
+    if session.info.pop('jobs_enqueued', False):
+        job_queue.wake()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_wake(session, previous_transaction):
+    """Задачи отменены вместе с транзакцией"""
+    session.info.pop('jobs_enqueued', None)
@@ -0,0 +1,27 @@
+import datetime
+import sqlalchemy
+from data.db_session import SqlAlchemyBase
+
+
+class Job(SqlAlchemyBase):
+    """Модель фоновой задачи (очередь хранится в базе и переживает перезапуск)"""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        sqlalchemy.Index('ix_jobs_status_run_at', 'status', 'run_at'),  # выбор следующей задачи
+    )
+
+    id = sqlalchemy.Column(sqlalchemy.Integer,
+                           primary_key=True, autoincrement=True)
+    kind = sqlalchemy.Column(sqlalchemy.String)  # тип задачи (имя обработчика)
+    payload = sqlalchemy.Column(sqlalchemy.String, default='{}')  # аргументы обработчика в json
+    status = sqlalchemy.Column(sqlalchemy.String, default='pending')  # pending/running/failed
+    attempts = sqlalchemy.Column(sqlalchemy.Integer, default=0)  # количество запусков
+    error = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # текст последней ошибки
+    created_date = sqlalchemy.Column(sqlalchemy.DateTime,
+                                     default=datetime.datetime.now)  # дата постановки в очередь
+    run_at = sqlalchemy.Column(sqlalchemy.DateTime,
+                               default=datetime.datetime.now)  # не раньше какого момента выполнять
+    started_date = sqlalchemy.Column(sqlalchemy.DateTime, nullable=True)  # начало последнего запуска
+
+    def __repr__(self):
+        return f'<Job> {self.kind} {self.status}'
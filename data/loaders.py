@@ -0,0 +1,25 @@
+from sqlalchemy.orm import joinedload, selectinload
+from data.news import News
+from data.space_objects import SpaceObject
+from data.space_systems import SpaceSystem
+
+
+def load_systems(db_sess):
+    """Загрузка всех звёздных систем вместе с их космическими объектами и создателями.
+
+    Выполняет два запроса (системы с создателями и объекты с создателями)
+    независимо от количества систем. Возвращает (Солнечная система, остальные системы)."""
+    systems = db_sess.query(SpaceSystem).options(
+        joinedload(SpaceSystem.user),
+        selectinload(SpaceSystem.space_objects).joinedload(SpaceObject.user)
+    ).order_by(SpaceSystem.id).all()
+    solar_system = next((system for system in systems if system.id == 1), None)  # специально для Солнечной системы
+    return solar_system, [system for system in systems if system.id != 1]
+
+
+def news_feed(db_sess, user_id=None):
+    """Запрос ленты: публичные записи и все свои записи пользователя user_id, вместе с авторами"""
+    query = db_sess.query(News).options(joinedload(News.user))  # авторы загружаются тем же запросом
+    if user_id is not None:  # если авторизован
+        return query.filter((News.user_id == user_id) | (News.is_private == False))  # все свои записи
+    return query.filter(News.is_private == False)  # только публичные (по индексу ленты)
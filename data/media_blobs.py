@@ -0,0 +1,24 @@
+import datetime
+import sqlalchemy
+from data.db_session import SqlAlchemyBase
+
+
+class MediaBlob(SqlAlchemyBase):
+    """Модель файла в хранилище медиа (имя файла - хэш содержимого)"""
+    __tablename__ = 'media_blobs'
+    __table_args__ = (
+        sqlalchemy.Index('ix_media_blobs_refcount_orphaned_date', 'refcount', 'orphaned_date'),  # сборка мусора
+    )
+
+    hash = sqlalchemy.Column(sqlalchemy.String, primary_key=True)  # sha256 содержимого
+    path = sqlalchemy.Column(sqlalchemy.String, unique=True)  # адрес файла (/static/...)
+    size = sqlalchemy.Column(sqlalchemy.Integer)  # размер, байт
+    srcset = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # уменьшенные копии изображения
+    srcset_webp = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # копии изображения в WebP
+    refcount = sqlalchemy.Column(sqlalchemy.Integer, default=0)  # количество записей, использующих файл
+    created_date = sqlalchemy.Column(sqlalchemy.DateTime,
+                                     default=datetime.datetime.now)  # дата загрузки
+    orphaned_date = sqlalchemy.Column(sqlalchemy.DateTime, nullable=True)  # с какого момента файл не используется
+
+    def __repr__(self):
+        return f'<MediaBlob> {self.path}'
@@ -0,0 +1,209 @@
+import datetime
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from flask import current_app
+from sqlalchemy import case, event, func, inspect, or_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from werkzeug.utils import secure_filename
+from data.images import STATIC_FOLDER, image_files, make_variants, remove_image
+from data.job_queue import enqueue, job
+from data.metrics import timed
+from data.media_blobs import MediaBlob
+from data.news import News
+from data.space_objects import SpaceObject
+
+MEDIA_FOLDER = 'img/media'  # папка хранилища внутри static
+CHUNK_SIZE = 64 * 1024  # загрузка пишется на диск и хэшируется кусками, байт
+GC_BATCH_SIZE = 100  # файлов за одну транзакцию сборки мусора
+GC_GRACE = datetime.timedelta(minutes=10)  # сколько неиспользуемый файл хранится до удаления
+MEDIA_REFERENCES = (  # модель, поле со ссылкой на файл, поля с его копиями
+    (News, 'photo_path', 'photo_srcset', 'photo_srcset_webp'),
+    (SpaceObject, 'image_path', 'image_srcset', 'image_srcset_webp'),
+)
+
+
+def store(db_sess, file):
+    """Сохранение загруженного файла в хранилище; одинаковые файлы хранятся один раз.
+
+    Ссылку на файл считает запись, в поле которой записан blob.path (см. _count_references)."""
+    ext = os.path.splitext(secure_filename(file.filename or ''))[1].lower()
+    folder = os.path.join(STATIC_FOLDER, MEDIA_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(suffix='.part', dir=folder)
+    try:
+        digest, size = hashlib.sha256(), 0
+        with timed('file'), os.fdopen(descriptor, 'wb') as temp:  # файл не читается в память целиком
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        content_hash = digest.hexdigest()
+        filename = f'{MEDIA_FOLDER}/{content_hash[:2]}/{content_hash}{ext}'
+        now = datetime.datetime.now()
+        # запись о файле появляется раньше самого файла: с этого момента транзакция держит блокировку
+        # записи, и сборщик мусора не удалит тот же файл, пока запрос не завершится
+        db_sess.execute(insert(MediaBlob).values(
+            hash=content_hash, path=f'{current_app.static_url_path}/{filename}', size=size,
+            refcount=0, created_date=now, orphaned_date=now).on_conflict_do_nothing(index_elements=['hash']))
+        blob = db_sess.query(MediaBlob).populate_existing().get(content_hash)
+        filename = blob.path[len(current_app.static_url_path) + 1:]  # у дубликата расширение первой загрузки
+        path = os.path.join(STATIC_FOLDER, filename)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+            enqueue(db_sess, 'make_variants', content_hash=content_hash)  # копии создаются в фоне
+        return blob
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def collect_garbage(db_sess, batch_size=GC_BATCH_SIZE, grace=GC_GRACE):
+    """Удаление неиспользуемых файлов хранилища пачками, возвращает количество удалённых"""
+    removed = 0
+    while True:
+        cutoff = datetime.datetime.now() - grace
+        candidates = db_sess.query(MediaBlob).filter(
+            MediaBlob.refcount <= 0, MediaBlob.orphaned_date < cutoff).limit(batch_size).all()
+        if not candidates:
+            return removed
+        for blob in candidates:
+            # удаление с повторной проверкой: на файл могли сослаться после выборки
+            deleted = db_sess.query(MediaBlob).filter(
+                MediaBlob.hash == blob.hash, MediaBlob.refcount <= 0,
+                MediaBlob.orphaned_date < cutoff).delete(synchronize_session=False)
+            if deleted:  # файлы удаляются до подтверждения, пока транзакция держит блокировку записи
+                remove_image(blob.path, blob.srcset, blob.srcset_webp)
+                removed += 1
+        db_sess.commit()
+        db_sess.expunge_all()
+
+
+def adopt_legacy_files(db_sess):
+    """Учёт в хранилище изображений, загруженных до него (news_photos, solar_img, system_<id>).
+
+    Для каждого пути из записей, у которого ещё нет строки в media_blobs, добавляется строка со
+    счётчиком, равным числу ссылающихся записей; дальше такие файлы удаляет сборщик мусора, когда
+    на них не остаётся ссылок (общий для нескольких записей файл - только после последней).
+    Возвращает количество добавленных файлов."""
+    references, variants = Counter(), {}
+    for model, attr, srcset, srcset_webp in MEDIA_REFERENCES:
+        column = getattr(model, attr)
+        rows = db_sess.query(column, func.count(), func.max(getattr(model, srcset)),
+                             func.max(getattr(model, srcset_webp))).filter(column != None).group_by(column)
+        for path, count, *path_variants in rows:
+            references[path] += count
+            variants.setdefault(path, path_variants)
+    known = {path for path, in db_sess.query(MediaBlob.path)}
+    prefix = f'{current_app.static_url_path}/'
+    now, adopted = datetime.datetime.now(), 0
+    for path, count in references.items():
+        filename = os.path.join(STATIC_FOLDER, path[len(prefix):])
+        if path in known or not path.startswith(prefix) or not os.path.isfile(filename):
+            continue
+        content_hash = _file_hash(filename)
+        if db_sess.query(MediaBlob).get(content_hash) is not None:  # такое же содержимое уже учтено под другим путём
+            content_hash = hashlib.sha256(f'{content_hash}:{path}'.encode()).hexdigest()
+        db_sess.add(MediaBlob(hash=content_hash, path=path, size=os.path.getsize(filename),
+                              srcset=variants[path][0], srcset_webp=variants[path][1],
+                              refcount=count, created_date=now, orphaned_date=None))
+        db_sess.flush()
+        adopted += 1
+    db_sess.commit()
+    return adopted
+
+
+def _file_hash(filename):
+    """sha256 содержимого файла (читается кусками)"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@event.listens_for(News.photo_path, 'set', active_history=True)
+@event.listens_for(SpaceObject.image_path, 'set', active_history=True)
+def _keep_old_path(target, value, oldvalue, initiator):
+    """Старый путь загружается и при записи в устаревший объект (active_history): иначе после commit
+    замена пути не попадёт в историю и ссылка на прежний файл не уменьшится"""
+
+
+@event.listens_for(Session, 'before_flush')
+def _count_references(session, flush_context, instances):
+    """Пересчёт ссылок на файлы хранилища по изменениям полей с путями к изображениям"""
+    changes = Counter()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for model, attr, srcset, srcset_webp in MEDIA_REFERENCES:
+            if not isinstance(obj, model):
+                continue
+            history = inspect(obj).attrs[attr].load_history()
+            added, removed = history.added, history.deleted
+            if obj in session.deleted:
+                added, removed = (), (*history.unchanged, *history.deleted)
+            for value in added:
+                changes[value] += 1
+            for value in removed:
+                changes[value] -= 1
+    if any(delta < 0 for delta in changes.values()):  # возможно, какой-то файл больше не нужен
+        enqueue(session, 'collect_media', delay=GC_GRACE + datetime.timedelta(seconds=1))
+    now = datetime.datetime.now()
+    for path, delta in changes.items():
+        if path and delta:  # старые загрузки учитываются только после adopt_legacy_files
+            refcount = MediaBlob.refcount + delta
+            session.query(MediaBlob).filter(MediaBlob.path == path).update(
+                {MediaBlob.refcount: refcount,
+                 MediaBlob.orphaned_date: case((refcount <= 0, now), else_=None)},
+                synchronize_session=False)
+
+
+@job('make_variants')
+def _make_variants(db_sess, content_hash):
+    """Задача: уменьшенные копии и WebP для нового файла и запись их во все ссылающиеся записи"""
+    blob = db_sess.query(MediaBlob).get(content_hash)
+    if blob is None:  # файл уже удалён сборщиком мусора
+        return
+    filename = blob.path[len(current_app.static_url_path) + 1:]
+    if not os.path.exists(os.path.join(STATIC_FOLDER, filename)):
+        return
+    blob.srcset, blob.srcset_webp = make_variants(filename)
+    for model, attr, srcset, srcset_webp in MEDIA_REFERENCES:
+        for item in db_sess.query(model).filter(getattr(model, attr) == blob.path):
+            setattr(item, srcset, blob.srcset)
+            setattr(item, srcset_webp, blob.srcset_webp)
+
+
+@job('collect_media')
+def _collect_media(db_sess):
+    """Задача: удаление файлов, на которые не осталось ссылок"""
+    adopt_legacy_files(db_sess)
+    collect_garbage(db_sess)
+
+
+@job('remove_dir')
+def _remove_dir(db_sess, path):
+    """Задача: удаление папки изображений удалённой системы (из версий до хранилища медиа).
+
+    Файлы, на которые ещё ссылается запись (оригиналом или копией из srcset) или учтённый
+    в хранилище файл, остаются, а с ними и папка; остальные удаляются вместе со строками media_blobs."""
+    if not os.path.isdir(path):
+        return
+    prefix = f'{current_app.static_url_path}/{os.path.relpath(path, STATIC_FOLDER)}/'
+    kept = set()
+    for model, *attrs in MEDIA_REFERENCES:
+        columns = [getattr(model, attr) for attr in attrs]
+        for row in db_sess.query(*columns).filter(or_(*[column.contains(prefix) for column in columns])):
+            kept.update(image_files(*row))
+    for blob in db_sess.query(MediaBlob).filter(MediaBlob.path.startswith(prefix), MediaBlob.refcount > 0):
+        kept.update(image_files(blob.path, blob.srcset, blob.srcset_webp))
+    for name in os.listdir(path):
+        filename = os.path.join(path, name)
+        if filename in kept or not os.path.isfile(filename):
+            continue
+        db_sess.query(MediaBlob).filter(MediaBlob.path == prefix + name).delete(synchronize_session=False)
+        os.remove(filename)
+    if not os.listdir(path):
+        os.rmdir(path)
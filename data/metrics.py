@@ -0,0 +1,158 @@
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, make_response, request
+from jinja2 import Template
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # границы гистограммы, с
+TIMERS = {'db': 'queries', 'template': 'templates', 'file': 'file ops'}  # составляющие времени запроса и их единицы
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _add(kind, seconds, count=1):
+    """Учёт времени в текущем запросе (вне запросов, например в фоновых задачах, не считается)"""
+    if has_request_context() and 'timings' in g:
+        timing = g.timings[kind]
+        timing[0] += count
+        timing[1] += seconds
+
+
+@contextmanager
+def timed(kind):
+    """Замер участка кода как составляющей времени запроса: with timed('file'): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(kind, time.perf_counter() - started)
+
+
+class TimedTemplate(Template):
+    """Шаблон Jinja, время отрисовки которого учитывается в запросе (сигналы Flask без blinker не работают)"""
+
+    def render(self, *args, **kwargs):
+        with timed('template'):
+            return super().render(*args, **kwargs)
+
+
+def instrument_engine(engine):
+    """Подсчёт запросов к базе и их времени (подключается в db_session.global_init)"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _finish_query(conn, cursor, statement, parameters, context, executemany):
+        _add('db', time.perf_counter() - conn.info['query_started'].pop())
+
+    @event.listens_for(engine, 'handle_error')
+    def _discard_query(context):
+        if context.connection is not None and context.connection.info.get('query_started'):
+            context.connection.info['query_started'].pop()  # запрос с ошибкой не учитывается
+
+
+def _labels(**labels):
+    """Метки в формате Prometheus"""
+    return ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for key, value in labels.items())
+
+
+class Metrics:
+    """Метрики запросов: гистограмма времени по маршрутам, запросы к базе, шаблоны и работа с файлами.
+
+    Отдаются в формате Prometheus на /metrics и в заголовке Server-Timing каждого ответа.
+    Счётчики у каждого процесса gunicorn свои."""
+
+    def __init__(self, app=None, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}  # (маршрут, метод) -> [количество в каждой корзине, сумма, количество]
+        self._responses = {}  # (маршрут, метод, статус) -> количество
+        self._timers = {}  # (маршрут, составляющая) -> [количество, секунды]
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Замер каждого запроса и маршрут /metrics"""
+        app.jinja_env.template_class = TimedTemplate
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.serve)
+
+    @staticmethod
+    def _start():
+        """Начало замера запроса"""
+        g.request_started = time.perf_counter()
+        g.timings = {kind: [0, 0.0] for kind in TIMERS}
+
+    def _finish(self, response):
+        """Учёт запроса и заголовок Server-Timing"""
+        if 'timings' not in g:  # before_request не дошёл до замера (ошибка в более раннем обработчике)
+            self._start()
+        duration = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'none'
+        self.observe(endpoint, request.method, response.status_code, duration, g.timings)
+        server_timing = [f'app;dur={duration * 1000:.1f}']
+        for kind, (count, seconds) in g.timings.items():
+            if count:
+                server_timing.append(f'{kind};dur={seconds * 1000:.1f};desc="{count} {TIMERS[kind]}"')
+        response.headers.add('Server-Timing', ', '.join(server_timing))
+        return response
+
+    def observe(self, endpoint, method, status, duration, timings):
+        """Учёт одного запроса"""
+        with self._lock:
+            histogram = self._histograms.setdefault((endpoint, method), [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            for kind, (count, seconds) in timings.items():
+                timer = self._timers.setdefault((endpoint, kind), [0, 0.0])
+                timer[0] += count
+                timer[1] += seconds
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus"""
+        lines = ['# HELP astrocat_request_duration_seconds Request latency by endpoint.',
+                 '# TYPE astrocat_request_duration_seconds histogram']
+        with self._lock:
+            for (endpoint, method), (buckets, total, count) in sorted(self._histograms.items()):
+                for bound, value in zip(self.buckets, buckets):
+                    lines.append(f'astrocat_request_duration_seconds_bucket'
+                                 f'{{{_labels(endpoint=endpoint, method=method, le=bound)}}} {value}')
+                labels = _labels(endpoint=endpoint, method=method)
+                lines.append(f'astrocat_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'astrocat_request_duration_seconds_sum{{{labels}}} {total}')
+                lines.append(f'astrocat_request_duration_seconds_count{{{labels}}} {count}')
+            lines += ['# HELP astrocat_responses_total Responses by endpoint and status.',
+                      '# TYPE astrocat_responses_total counter']
+            for (endpoint, method, status), count in sorted(self._responses.items()):
+                lines.append(f'astrocat_responses_total'
+                             f'{{{_labels(endpoint=endpoint, method=method, status=status)}}} {count}')
+            for kind in TIMERS:
+                timers = sorted((endpoint, value) for (endpoint, timer_kind), value in self._timers.items()
+                                if timer_kind == kind)
+                lines += [f'# HELP astrocat_{kind}_operations_total Number of {TIMERS[kind]} in requests.',
+                          f'# TYPE astrocat_{kind}_operations_total counter']
+                lines += [f'astrocat_{kind}_operations_total{{{_labels(endpoint=endpoint)}}} {count}'
+                          for endpoint, (count, seconds) in timers]
+                lines += [f'# HELP astrocat_{kind}_seconds_total Time spent on {TIMERS[kind]} in requests.',
+                          f'# TYPE astrocat_{kind}_seconds_total counter']
+                lines += [f'astrocat_{kind}_seconds_total{{{_labels(endpoint=endpoint)}}} {seconds}'
+                          for endpoint, (count, seconds) in timers]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self):
+        """Отдача метрик"""
+        response = make_response(self.render())
+        response.headers['Content-Type'] = PROMETHEUS_CONTENT_TYPE
+        return response
+
+
+metrics = Metrics()
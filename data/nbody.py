@@ -0,0 +1,191 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+G = 4 * np.pi ** 2  # гравитационная постоянная в а.е.^3 / (масса Солнца * год^2)
+EARTH_MASSES_PER_SUN = 332946.0  # поле m хранится в массах Земли
+KM_S_TO_AU_YEAR = 0.210945  # поле v хранится в км/с
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))  # начальные углы тел, чтобы они не выстраивались в линию
+SOFTENING = 1e-4  # сглаживание потенциала при тесных сближениях, а.е.
+NBODY_CACHE_FOLDER = 'cache/nbody'  # дисковый кэш результатов, общий для процессов
+NBODY_CACHE_VERSION = 1  # меняется вместе с алгоритмом, чтобы не брать старые результаты
+MEMORY_ENTRIES = 32  # сколько результатов держать в памяти
+# коэффициенты схемы Йошиды 4-го порядка, составленной из трёх шагов leapfrog
+_W1 = 1 / (2 - 2 ** (1 / 3))
+_W0 = -2 ** (1 / 3) * _W1
+SCHEMES = {
+    'leapfrog': ((0.5, 1.0), (0.5, None)),  # (доля шага для координат, доля шага для скоростей)
+    'yoshida': ((_W1 / 2, _W1), ((_W0 + _W1) / 2, _W0), ((_W0 + _W1) / 2, _W1), (_W1 / 2, None)),
+}
+
+
+class SystemState:
+    """Начальное состояние системы: массы (массы Солнца), координаты (а.е.) и скорости (а.е./год) тел"""
+
+    def __init__(self, names, masses, positions, velocities):
+        self.names = list(names)
+        self.masses = np.asarray(masses, dtype=np.float64)
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.velocities = np.asarray(velocities, dtype=np.float64)
+
+    @classmethod
+    def from_space_system(cls, space_system):
+        """Состояние из объектов звёздной системы.
+
+        Самое массивное тело - центральное. Остальные стоят на расстоянии radius под углами,
+        идущими через золотой угол, и движутся перпендикулярно радиусу со скоростью v
+        (или круговой, если v не указана). Систему переводим в систему центра масс."""
+        objects = sorted(space_system.space_objects, key=lambda item: item.id)
+        masses = np.array([(item.m or 0) / EARTH_MASSES_PER_SUN for item in objects], dtype=np.float64)
+        radius = np.array([max(item.radius or 0, 0) for item in objects], dtype=np.float64)
+        speed = np.array([max(item.v or 0, 0) * KM_S_TO_AU_YEAR for item in objects], dtype=np.float64)
+        central_mass = masses.max(initial=0) or 1.0  # без масс - звезда в одну массу Солнца
+        circular = np.sqrt(np.divide(G * central_mass, radius, out=np.zeros_like(radius), where=radius > 0))
+        speed = np.where(speed > 0, speed, circular)
+        speed[radius == 0] = 0
+        angle = GOLDEN_ANGLE * np.arange(len(objects))
+        direction = np.stack((np.cos(angle), np.sin(angle)), axis=-1)
+        positions = radius[:, None] * direction
+        velocities = speed[:, None] * direction[:, ::-1] * (-1, 1)  # поворот на 90 градусов против часовой
+        total = masses.sum()
+        if total > 0:
+            positions -= masses @ positions / total
+            velocities -= masses @ velocities / total
+        return cls([item.name for item in objects], masses, positions, velocities)
+
+    def key(self, **params):
+        """Хэш состояния и параметров расчёта - ключ кэша"""
+        digest = hashlib.sha256(repr((NBODY_CACHE_VERSION, sorted(params.items()))).encode())
+        for array in (self.masses, self.positions, self.velocities):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+
+def accelerations(positions, masses, softening=SOFTENING):
+    """Ускорения всех тел; positions (..., тела, 2), masses (..., тела) - пачка систем одного размера"""
+    delta = positions[..., None, :, :] - positions[..., :, None, :]  # (..., i, j, 2): от тела i к телу j
+    distance2 = np.einsum('...k,...k->...', delta, delta) + softening ** 2
+    inverse3 = distance2 ** -1.5
+    inverse3 *= masses[..., None, :]
+    return G * np.einsum('...ij,...ijk->...ik', inverse3, delta)
+
+
+def energy(positions, velocities, masses, softening=SOFTENING):
+    """Полная энергия (для контроля точности интегрирования)"""
+    kinetic = 0.5 * np.einsum('...i,...ik,...ik->...', masses, velocities, velocities)
+    delta = positions[..., None, :, :] - positions[..., :, None, :]
+    distance = np.sqrt(np.einsum('...k,...k->...', delta, delta) + softening ** 2)
+    pairs = masses[..., :, None] * masses[..., None, :] / distance
+    diagonal = np.einsum('...ii->...i', pairs).sum(axis=-1)
+    return kinetic - G * 0.5 * (pairs.sum(axis=(-2, -1)) - diagonal)
+
+
+def integrate(masses, positions, velocities, dt, steps, every=1, scheme='yoshida'):
+    """Симплектическое интегрирование: координаты каждые every шагов, конечные координаты и скорости.
+
+    Работает и для пачки систем с одинаковым числом тел: массивы с лишним первым измерением."""
+    positions, velocities = positions.copy(), velocities.copy()
+    coefficients = SCHEMES[scheme]
+    samples = [positions.copy()]
+    for step in range(1, steps + 1):
+        for drift, kick in coefficients:
+            positions += drift * dt * velocities
+            if kick is not None:
+                velocities += kick * dt * accelerations(positions, masses)
+        if step % every == 0:
+            samples.append(positions.copy())
+    return np.stack(samples, axis=-3), positions, velocities
+
+
+def _run(state, years, dt, every, scheme):
+    """Расчёт одной системы (выполняется в процессе пула)"""
+    steps = max(1, int(round(years / dt)))
+    trajectory, positions, velocities = integrate(state.masses, state.positions, state.velocities,
+                                                  dt, steps, every, scheme)
+    start = energy(state.positions, state.velocities, state.masses)
+    finish = energy(positions, velocities, state.masses)
+    return {'times': dt * every * np.arange(len(trajectory)), 'positions': trajectory,
+            'velocities': velocities, 'energy_error': float(abs((finish - start) / start)) if start else 0.0}
+
+
+class Simulator:
+    """Расчёт систем с кэшем по хэшу начального состояния и параметров: в памяти и на диске.
+
+    Независимые системы (или варианты одной системы с разными параметрами) считаются в пуле процессов."""
+
+    def __init__(self, folder=NBODY_CACHE_FOLDER):
+        self.folder = folder
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def simulate(self, state, years=1.0, dt=0.001, every=10, scheme='yoshida'):
+        """Траектории одной системы"""
+        return self.simulate_many([state], years, dt, every, scheme)[0]
+
+    def simulate_many(self, states, years=1.0, dt=0.001, every=10, scheme='yoshida', workers=None):
+        """Траектории нескольких систем, посчитанных параллельно; уже посчитанные берутся из кэша"""
+        params = {'years': years, 'dt': dt, 'every': every, 'scheme': scheme}
+        keys = [state.key(**params) for state in states]
+        results = [self._cached(key) for key in keys]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if len(missing) == 1 or workers == 1:
+            for index in missing:
+                results[index] = _run(states[index], years, dt, every, scheme)
+        elif missing:
+            # spawn: рабочий процесс приложения с потоками очереди задач небезопасно копировать через fork
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(missing)),
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = {index: pool.submit(_run, states[index], years, dt, every, scheme) for index in missing}
+                for index, future in futures.items():
+                    results[index] = future.result()
+        for index in missing:
+            self._store(keys[index], results[index])
+        with self._lock:
+            self.hits += len(states) - len(missing)
+            self.misses += len(missing)
+        return results
+
+    def _path(self, key):
+        """Файл результата в дисковом кэше"""
+        return os.path.join(self.folder, key[:2], f'{key}.npz')
+
+    def _cached(self, key):
+        """Результат из памяти или с диска"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            result = {name: data[name] for name in data.files}
+        result['energy_error'] = float(result['energy_error'])
+        self._remember(key, result)
+        return result
+
+    def _store(self, key, result):
+        """Сохранение результата в память и на диск"""
+        self._remember(key, result)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+        with open(temp_path, 'wb') as file:
+            np.savez(file, **result)
+        os.replace(temp_path, path)  # другие процессы не увидят недописанный файл
+
+    def _remember(self, key, result):
+        """Результат в памяти с вытеснением давно не использованных"""
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+
+simulator = Simulator()
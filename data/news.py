@@ -8,12 +8,18 @@ from data.db_session import SqlAlchemyBase
 class News(SqlAlchemyBase, SerializerMixin):
     """Модель записи пользователя"""
     __tablename__ = 'news'  # название таблицы
+    __table_args__ = (
+        sqlalchemy.Index('ix_news_is_private_created_date', 'is_private', 'created_date', 'id'),  # лента
+        sqlalchemy.Index('ix_news_user_id_created_date', 'user_id', 'created_date'),  # записи пользователя
+    )
 
     id = sqlalchemy.Column(sqlalchemy.Integer,
                            primary_key=True, autoincrement=True)  # идентификатор
     title = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # заголовок
     content = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # содержимое (текст)
     photo_path = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # путь к изображению
+    photo_srcset = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # уменьшенные копии изображения
+    photo_srcset_webp = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # копии изображения в WebP
     created_date = sqlalchemy.Column(sqlalchemy.DateTime,
                                      default=datetime.datetime.now)  # дата создания
     is_private = sqlalchemy.Column(sqlalchemy.Boolean, default=True)  # личное/публичное
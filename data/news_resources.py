@@ -1,54 +1,60 @@
-from flask_restful import Resource, abort
+import datetime
 from flask import jsonify
 from data import db_session
 from data.news import News
 from data.parsers import news_parser
+from data.resources import ModelResource, ModelListResource
+from data.serializers import Serializer, json_response
 
 
-class NewsResource(Resource):
+class NewsResource(ModelResource):
     """Ресурс записи (restful-api)"""
+    model = News
+    title = 'News'
+    serializer = Serializer(News, ('title', 'content', 'user.name', 'is_private', 'photo_path'))
 
     def get(self, news_id):
         """Получение записи"""
-        abort_if_news_not_found(news_id)
-        session = db_session.create_session()
-        news = session.query(News).get(news_id)
-        return jsonify({'news': news.to_dict(
-            only=('title', 'content', 'user.name', 'is_private', 'photo_path'))})  # возвращаем json
+        session, news = self.get_item(news_id)
+        return self.respond(news, 'news')  # возвращаем json
 
     def post(self, news_id):
         """Изменение записи"""
-        abort_if_news_not_found(news_id)
+        session, news = self.get_item(news_id)
+        self.check_version(news)
         args = news_parser.parse_args()  # парсер аргументов
-        session = db_session.create_session()
-        news = session.query(News).get(news_id)
         news.title = args['title']
         news.content = args['content']
         news.is_private = args['is_private']
         news.user_id = args['user_id']
         session.commit()
-        return jsonify({'success': 'OK'})  # возвращаем json {ok}
+        return self.success(news)  # возвращаем json {ok}
 
     def delete(self, news_id):
         """Удаление записи"""
-        abort_if_news_not_found(news_id)
-        session = db_session.create_session()
-        news = session.query(News).get(news_id)
+        session, news = self.get_item(news_id)
+        self.check_version(news)
         session.delete(news)
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success()
 
 
-class NewsListResource(Resource):
+class NewsListResource(ModelListResource):
     """Ресурс списка записей (restful-api)"""
+    model = News
+    sort_fields = ('id', 'created_date', 'title')
+    filters = {
+        'user_id': ('user_id', 'eq', int),
+        'created_after': ('created_date', 'gt', datetime.datetime),
+        'created_before': ('created_date', 'lt', datetime.datetime),
+    }
+    serializer = Serializer(News, ('title', 'content', 'user.name', 'photo_path'))
 
     def get(self):
-        """Получение всех записей"""
-        session = db_session.create_session()
-        news = session.query(News).all()
-        return jsonify({'news': [item.to_dict(
-            only=('title', 'content', 'user.name', 'photo_path')) for item in
-            news]})  # возвращаем json со всеми записями
+        """Получение страницы записей"""
+        news, next_url = self.get_page()
+        return json_response({'news': self.serializer.many(news),
+                              'next': next_url})  # возвращаем json со страницей записей
 
     def post(self):
         """Публикация новой записи"""
@@ -63,11 +69,3 @@ class NewsListResource(Resource):
         session.add(news)
         session.commit()
         return jsonify({'success': 'OK'})
-
-
-def abort_if_news_not_found(news_id):
-    """Обработка в ситуации, когда записи с указанным id не существует"""
-    session = db_session.create_session()
-    news = session.query(News).get(news_id)
-    if not news:
-        abort(404, message=f"News {news_id} not found")  # ошибка 404, json {not found}
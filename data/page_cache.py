@@ -0,0 +1,206 @@
+import multiprocessing
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import g, make_response, request
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+PAGE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # размер кэша страниц по умолчанию
+ENTRY_OVERHEAD = 512  # примерный расход памяти на запись помимо тела ответа
+CACHED_HEADERS = ('Content-Type',)  # заголовки, которые сохраняются вместе со страницей
+
+
+class PageCache:
+    """Кэш готовых html-страниц с вытеснением давно не использованных (LRU) и сбросом по тегам"""
+
+    def __init__(self, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # ключ -> (тело, статус, заголовки, теги)
+        self._tags = {}  # тег -> ключи страниц
+        self._size = 0
+        self._lock = threading.Lock()
+        self.generation = 0  # растёт при каждом сбросе, чтобы не сохранить страницу, устаревшую во время отрисовки
+        # счётчик сбросов, общий для рабочих процессов (создаётся до fork, поэтому нужен preload_app, см.
+        # gunicorn.conf.py): сброс в соседнем процессе очищает и этот кэш целиком, ведь какие теги там
+        # сбрасывались, отсюда не видно
+        self._shared_generation = multiprocessing.Value('Q', 0)
+        self._seen_generation = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        """Сохранённая страница или None"""
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, body, status, headers, tags, generation):
+        """Сохранение страницы, если с начала её отрисовки ничего не сбрасывалось"""
+        size = len(body) + ENTRY_OVERHEAD
+        with self._lock:
+            self._sync()
+            if generation != self.generation or size > self.max_bytes:
+                return
+            self._remove(key)
+            self._entries[key] = (body, status, headers, tags)
+            self._size += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        """Сброс всех страниц с указанными тегами"""
+        with self._lock:
+            self._publish()
+            self.generation += 1
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    if self._remove(key):
+                        self.invalidations += 1
+
+    def clear(self):
+        """Сброс всего кэша"""
+        with self._lock:
+            self._publish()
+            self._clear()
+
+    def _clear(self):
+        """Очистка всех записей (вызывается под блокировкой)"""
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self._size = 0
+
+    def _sync(self):
+        """Очистка, если с прошлой проверки кэш сбрасывал другой процесс (вызывается под блокировкой)"""
+        shared = self._shared_generation.value
+        if shared != self._seen_generation:
+            self._seen_generation = shared
+            self._clear()
+
+    def _publish(self):
+        """Сообщение другим процессам о сбросе (вызывается под блокировкой)"""
+        with self._shared_generation.get_lock():
+            self._shared_generation.value += 1
+            shared = self._shared_generation.value
+        if shared != self._seen_generation + 1:  # до этого сбрасывал и другой процесс
+            self._clear()
+        self._seen_generation = shared
+
+    def stats(self):
+        """Статистика попаданий и заполненности"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / requests if requests else 0.0,
+                    'evictions': self.evictions, 'invalidations': self.invalidations,
+                    'entries': len(self._entries), 'bytes': self._size, 'max_bytes': self.max_bytes}
+
+    def _remove(self, key):
+        """Удаление записи (вызывается под блокировкой)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._size -= len(entry[0]) + ENTRY_OVERHEAD
+        for tag in entry[3]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+
+page_cache = PageCache()
+
+
+def cache_tags(*tags):
+    """Добавление тегов к странице, которая сейчас отрисовывается"""
+    if 'page_cache_tags' in g:
+        g.page_cache_tags.update(tags)
+
+
+def cached_page(*tags):
+    """Декоратор: кэширование GET-страницы по маршруту, аргументам и пользователю"""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            viewer = f'viewer:{current_user.id}' if current_user.is_authenticated else 'viewer:anonymous'
+            key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string, viewer)
+            entry = page_cache.get(key)
+            if entry is not None:
+                body, status, headers, entry_tags = entry
+                response = make_response(body, status, headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+            generation = page_cache.generation
+            g.page_cache_tags = {viewer, *tags}
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                headers = [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+                page_cache.set(key, response.get_data(), response.status_code, headers,
+                               frozenset(g.page_cache_tags), generation)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def model_tags(obj):
+    """Теги страниц, на которые влияет изменение записи модели (с учётом старых значений)"""
+    from data.news import News
+    from data.space_objects import SpaceObject
+    from data.space_systems import SpaceSystem
+    from data.users import User
+
+    state = inspect(obj)
+
+    def values(attr):
+        history = state.attrs[attr].history  # у незаданного поля новой записи части истории - None
+        return {value for part in history for value in part or () if value is not None}
+
+    if isinstance(obj, News):
+        return {f'user:{user_id}' for user_id in values('user_id') | {obj.user_id} if user_id is not None}
+    if isinstance(obj, SpaceObject):
+        return {'database', f'space_object:{obj.id}'}
+    if isinstance(obj, SpaceSystem):
+        return {'database', f'space_system:{obj.id}'}
+    if isinstance(obj, User):
+        return {f'user:{obj.id}', f'viewer:{obj.id}'}
+    return set()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tags(session, flush_context):
+    """Сбор тегов изменённых записей до подтверждения транзакции"""
+    tags = session.info.setdefault('page_cache_tags', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tags.update(model_tags(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_tags(session):
+    """Сброс страниц после подтверждения изменений"""
+    tags = session.info.pop('page_cache_tags', None)
+    if tags:
+        page_cache.invalidate(*tags)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_tags(session, previous_transaction):
+    """Изменения отменены - сбрасывать нечего"""
+    session.info.pop('page_cache_tags', None)
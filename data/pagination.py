@@ -0,0 +1,81 @@
+import base64
+import datetime
+import json
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(created_date, item_id):
+    """Кодирование курсора из пары (дата создания, id)"""
+    raw = f'{created_date.isoformat()}|{item_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Декодирование курсора, None если курсор некорректен"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_date, item_id = raw.split('|')
+        return datetime.datetime.fromisoformat(created_date), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(query, model, page_size, before=None, after=None):
+    """Страница записей по ключу (created_date, id), от новых к старым.
+
+    before - курсор, начиная с которого показываются более старые записи,
+    after - курсор, до которого показываются более новые записи.
+    Возвращает (записи, курсор более новых, курсор более старых)."""
+    key = tuple_(model.created_date, model.id)
+    before, after = before and decode_cursor(before), after and decode_cursor(after)
+    if after:  # листаем к новым: идём по возрастанию и разворачиваем
+        items = query.filter(key > after).order_by(
+            model.created_date.asc(), model.id.asc()).limit(page_size + 1).all()
+        if not items:  # новее ничего нет - показываем первую страницу
+            return keyset_page(query, model, page_size)
+        has_more_newer, has_more_older = len(items) > page_size, True
+        items = items[:page_size][::-1]
+    else:
+        if before:
+            query = query.filter(key < before)
+        items = query.order_by(
+            model.created_date.desc(), model.id.desc()).limit(page_size + 1).all()
+        has_more_newer, has_more_older = bool(before), len(items) > page_size
+        items = items[:page_size]
+    if not items:
+        return items, None, None
+    newer = encode_cursor(items[0].created_date, items[0].id) if has_more_newer else None
+    older = encode_cursor(items[-1].created_date, items[-1].id) if has_more_older else None
+    return items, newer, older
+
+
+def encode_key(sort, value, item_id):
+    """Кодирование курсора списка api: поле сортировки, его значение и id"""
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, item_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_key(cursor, sort, column):
+    """Декодирование курсора списка api, None если курсор некорректен или от другой сортировки"""
+    try:
+        cursor_sort, value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if cursor_sort != sort:
+            return None
+        if value is not None and column.type.python_type is datetime.datetime:
+            value = datetime.datetime.fromisoformat(value)
+        return value, int(item_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None
+
+
+def after_key(column, id_column, value, item_id, descending=False):
+    """Условие "строго после (value, id)" с учётом NULL (SQLite ставит NULL первыми по возрастанию)"""
+    if not descending:
+        if value is None:
+            return or_(and_(column.is_(None), id_column > item_id), column.isnot(None))
+        return or_(column > value, and_(column == value, id_column > item_id))
+    if value is None:
+        return and_(column.is_(None), id_column < item_id)
+    return or_(column < value, and_(column == value, id_column < item_id), column.is_(None))
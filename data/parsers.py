@@ -36,3 +36,14 @@ space_system_parser.add_argument('name', required=True)
 space_system_parser.add_argument('galaxy')
 space_system_parser.add_argument('about')
 space_system_parser.add_argument('creator', required=True, type=int)
+
+search_parser = reqparse.RequestParser()  # парсер аргументов для ресурса поиска
+search_parser.add_argument('q', required=True, location='args')
+search_parser.add_argument('kind', action='append', location='args')
+search_parser.add_argument('limit', type=int, default=20, location='args')
+
+ephemeris_parser = reqparse.RequestParser()  # парсер аргументов для ресурса эфемерид
+ephemeris_parser.add_argument('t0', type=float, default=0.0, location='args')
+ephemeris_parser.add_argument('t1', type=float, default=1.0, location='args')
+ephemeris_parser.add_argument('step', type=float, default=0.01, location='args')
+ephemeris_parser.add_argument('format', choices=('json', 'binary'), default='json', location='args')
@@ -0,0 +1,103 @@
+import datetime
+import re
+import sqlalchemy as sa
+from data.loaders import load_systems, news_feed
+from data.news import News
+from data.news_resources import NewsListResource
+from data.pagination import encode_cursor, encode_key, keyset_page
+from data.space_object_resources import SpaceObjectsListResource
+from data.space_objects import SpaceObject
+from data.space_system_resources import SpaceSystemsListResource
+from data.users import User
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)( AS \w+)?$')  # полный проход по таблице без индекса
+FEED_PAGE = 10  # размер страницы ленты (на план не влияет)
+
+
+def route_queries(db_sess):
+    """Проверяемые маршруты: {название: (функция, таблицы, которые маршрут читает целиком)}.
+
+    Функции вызывают тот же код, что и маршруты (ленту, загрузку систем, страницы списков api),
+    поэтому проверяются запросы, которые они действительно строят. Выборка всех систем на /database
+    проходит таблицу space_systems целиком намеренно, остальные запросы обязаны идти по индексам."""
+    now = datetime.datetime.now()
+    older, newer = encode_cursor(now, 1), encode_cursor(now - datetime.timedelta(days=30), 1)
+    return {
+        'main_page: лента': (lambda: keyset_page(news_feed(db_sess), News, FEED_PAGE), ()),
+        'main_page: старые записи': (
+            lambda: keyset_page(news_feed(db_sess), News, FEED_PAGE, before=older), ()),
+        'main_page: новые записи': (
+            lambda: keyset_page(news_feed(db_sess), News, FEED_PAGE, after=newer), ()),
+        'main_page: лента авторизованного': (lambda: keyset_page(news_feed(db_sess, 1), News, FEED_PAGE), ()),
+        'main_page: новые записи авторизованного': (
+            lambda: keyset_page(news_feed(db_sess, 1), News, FEED_PAGE, after=newer), ()),
+        'data_page': (lambda: load_systems(db_sess), ('space_systems',)),
+        'space_object_info': (lambda: db_sess.query(SpaceObject).filter(SpaceObject.name == 'Земля').all(), ()),
+        'user_profile': (lambda: db_sess.query(User).filter(User.username == 'user').all(), ()),
+        'user_profile: записи': (lambda: db_sess.query(News).filter(News.user_id == 1).all(), ()),
+        'login': (lambda: db_sess.query(User).filter((User.email == 'user') | (User.username == 'user')).all(), ()),
+        'delete_system: объекты': (lambda: db_sess.query(SpaceObject).filter(SpaceObject.system == 1).all(), ()),
+        'api: объекты системы': (lambda: list_page(db_sess, SpaceObjectsListResource, system='1'), ()),
+        'api: объекты системы, следующая страница': (
+            lambda: list_page(db_sess, SpaceObjectsListResource, system='1', cursor=list_cursor('id', 1)), ()),
+        'api: объекты пользователя': (lambda: list_page(db_sess, SpaceObjectsListResource, creator='1'), ()),
+        'api: системы пользователя': (lambda: list_page(db_sess, SpaceSystemsListResource, creator='1'), ()),
+        'api: записи пользователя': (lambda: list_page(db_sess, NewsListResource, user_id='1'), ()),
+    }
+
+
+def list_page(db_sess, resource, **args):
+    """Страница списка api с параметрами args - запрос строит сам ресурс (ModelListResource.page_query)"""
+    query = resource().page_query(db_sess, args)[0]
+    return query.all()
+
+
+def list_cursor(sort, item_id):
+    """Курсор списка api после записи item_id"""
+    return encode_key(sort, item_id, item_id)
+
+
+def captured_statements(db_sess, function):
+    """SQL-запросы (текст и параметры), которые выполняет function"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db_sess.get_bind()
+    sa.event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        function()
+    finally:
+        sa.event.remove(engine, 'before_cursor_execute', capture)
+    db_sess.expunge_all()  # следующая проверка снова загрузит записи из базы, а не из карты идентичности
+    return statements
+
+
+def explain(db_sess, statement, parameters=()):
+    """Строки EXPLAIN QUERY PLAN для SQL-запроса"""
+    rows = db_sess.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', tuple(parameters))
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan, allowed=()):
+    """Шаги плана с полным проходом по таблице, кроме таблиц allowed"""
+    matches = [(step, FULL_SCAN.match(step)) for step in plan]
+    return [step for step, match in matches if match and match['table'] not in allowed]
+
+
+def route_plans(db_sess, name):
+    """Планы всех запросов маршрута name: [(SQL, план)]"""
+    function, _ = route_queries(db_sess)[name]
+    return [(statement, explain(db_sess, statement, parameters))
+            for statement, parameters in captured_statements(db_sess, function)]
+
+
+def check_query_plans(db_sess):
+    """Проверка планов запросов маршрутов: {название: план} для запросов с полным проходом по таблице"""
+    failures = {}
+    for name, (_, allowed) in route_queries(db_sess).items():
+        for statement, plan in route_plans(db_sess, name):
+            if full_scans(plan, allowed):
+                failures.setdefault(name, []).extend(plan)
+    return failures
@@ -0,0 +1,149 @@
+import datetime
+import hashlib
+import operator
+from flask import Response, make_response, request, stream_with_context, url_for
+from flask_restful import Resource, abort
+from data import db_session
+from data.bulk import export_lines, import_lines
+from data.pagination import after_key, decode_key, encode_key
+from data.serializers import json_response
+
+
+class ModelResource(Resource):
+    """Базовый ресурс одной записи модели (restful-api).
+
+    Находит запись одним запросом, отдаёт ETag, отвечает 304 на If-None-Match
+    и отклоняет изменение устаревшей версии (If-Match) с кодом 412."""
+    model = None  # модель ресурса
+    title = 'Object'  # название записи в сообщениях об ошибках
+    serializer = None  # сериализатор записи (data.serializers.Serializer)
+
+    def get_item(self, item_id):
+        """Получение записи (вместе с нужными сериализатору связями) или ошибка 404"""
+        session = db_session.create_session()
+        options = self.serializer.options if self.serializer else ()
+        item = session.query(self.model).options(*options).get(item_id)
+        if not item:
+            abort(404, message=f"{self.title} {item_id} not found")  # ошибка 404, json {not found}
+        return session, item
+
+    def etag(self, item, payload=None):
+        """ETag записи - хэш значений её столбцов и ответа api (в нём есть поля связанных записей,
+        например имя автора, поэтому их изменение тоже меняет ETag)"""
+        values = tuple(getattr(item, column.key) for column in item.__table__.columns)
+        if payload is None and self.serializer is not None:
+            payload = self.serializer(item)
+        return hashlib.sha1(repr((values, payload)).encode()).hexdigest()
+
+    def respond(self, item, key):
+        """Ответ на GET: 304, если у клиента актуальная версия, иначе json {key: запись}"""
+        payload = self.serializer(item)
+        etag = self.etag(item, payload)
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            response = json_response({key: payload})
+        response.set_etag(etag)
+        return response
+
+    def check_version(self, item):
+        """Ошибка 412, если клиент изменяет не последнюю версию записи"""
+        if 'If-Match' in request.headers and not request.if_match.contains(self.etag(item)):
+            abort(412, message=f"{self.title} {item.id} has been modified")
+
+    def success(self, item=None):
+        """Ответ об успешном изменении (с новым ETag, если запись осталась)"""
+        response = json_response({'success': 'OK'})
+        if item is not None:
+            response.set_etag(self.etag(item))
+        return response
+
+
+class ModelListResource(Resource):
+    """Базовый ресурс списка записей модели (restful-api).
+
+    Отдаёт страницу из limit записей с курсором на следующую, поддерживает
+    сортировку (sort=поле или sort=-поле) и фильтры из белых списков.
+    Сортировка и фильтры выполняются в SQL."""
+    model = None  # модель ресурса
+    sort_fields = ('id',)  # поля, по которым разрешена сортировка
+    filters = {}  # параметр запроса -> (поле, операция, тип значения)
+    serializer = None  # сериализатор записей (data.serializers.Serializer)
+    default_limit = 50  # размер страницы по умолчанию
+    max_limit = 200  # максимальный размер страницы
+
+    def get_page(self):
+        """Получение страницы записей и ссылки на следующую страницу"""
+        query, sort, column, limit = self.page_query(db_session.create_session(), request.args)
+        items = query.all()
+        next_url = None
+        if len(items) > limit:
+            items = items[:limit]
+            args = request.args.to_dict()
+            args['cursor'] = encode_key(sort, getattr(items[-1], column.key), items[-1].id)
+            next_url = url_for(request.endpoint, **args)
+        return items, next_url
+
+    def page_query(self, session, args):
+        """Запрос страницы по параметрам args (фильтры, sort, limit, cursor): (запрос, sort, поле, limit).
+
+        Запрос выбирает одну лишнюю запись - признак следующей страницы."""
+        query = session.query(self.model).options(*self.serializer.options)
+        for param, (field, operation, value_type) in self.filters.items():
+            if param in args:
+                value = parse_value(param, args[param], value_type)
+                query = query.filter(FILTER_OPERATIONS[operation](getattr(self.model, field), value))
+        sort = args.get('sort', 'id')
+        descending = sort.startswith('-')
+        if sort.lstrip('-') not in self.sort_fields:
+            abort(400, message=f"Sorting by {sort.lstrip('-')} is not allowed")
+        column = getattr(self.model, sort.lstrip('-'))
+        limit = parse_value('limit', args.get('limit', self.default_limit), int)
+        if not 0 < limit <= self.max_limit:
+            abort(400, message=f"limit must be between 1 and {self.max_limit}")
+        if 'cursor' in args:
+            key = decode_key(args['cursor'], sort, column)
+            if key is None:
+                abort(400, message="Invalid cursor")
+            query = query.filter(after_key(column, self.model.id, *key, descending=descending))
+        if descending:
+            query = query.order_by(column.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(column.asc(), self.model.id.asc())
+        return query.limit(limit + 1), sort, column, limit
+
+
+class ExportResource(Resource):
+    """Базовый ресурс потоковой выгрузки всех записей модели в NDJSON (restful-api)"""
+    model = None
+
+    def get(self):
+        """Выгрузка всех записей, по одной json-строке на запись"""
+        return Response(stream_with_context(export_lines(self.model)), mimetype='application/x-ndjson')
+
+
+class ImportResource(Resource):
+    """Базовый ресурс пакетной загрузки записей модели из NDJSON (restful-api)"""
+    model = None
+
+    def post(self):
+        """Загрузка записей из тела запроса, по одной json-строке на запись"""
+        inserted, errors = import_lines(self.model, iter(request.stream.readline, b''))
+        return json_response({'inserted': inserted, 'errors': errors})
+
+
+FILTER_OPERATIONS = {
+    'eq': operator.eq,
+    'gt': operator.gt,
+    'lt': operator.lt,
+}
+
+
+def parse_value(param, value, value_type):
+    """Приведение параметра запроса к типу или ошибка 400"""
+    try:
+        if value_type is datetime.datetime:
+            return datetime.datetime.fromisoformat(value)
+        return value_type(value)
+    except (ValueError, TypeError):
+        abort(400, message=f"Invalid value for {param}: {value}")
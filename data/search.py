@@ -0,0 +1,87 @@
+from urllib.parse import quote
+from markupsafe import Markup, escape
+from sqlalchemy import text
+
+# источник -> (таблица, индексируемые поля); индексы FTS5 хранят только ссылки на строки таблиц
+SEARCH_SOURCES = {
+    'news': ('news', ('title', 'content')),
+    'space_object': ('space_objects', ('name', 'about', 'atmosphere')),
+    'space_system': ('space_systems', ('name', 'about')),
+}
+# запросы результатов: id, заголовок, ключ ссылки, фрагмент и ранг bm25 ({fts} - таблица индекса)
+SEARCH_QUERIES = {
+    'news': """
+        SELECT n.id, n.title, u.username, snippet({fts}, -1, :open, :close, '…', 12), bm25({fts})
+        FROM {fts} JOIN news n ON n.id = {fts}.rowid LEFT JOIN users u ON u.id = n.user_id
+        WHERE {fts} MATCH :query AND (n.is_private != 1 OR n.user_id = :user_id)
+        ORDER BY bm25({fts}) LIMIT :limit""",
+    'space_object': """
+        SELECT o.id, o.name, o.name, snippet({fts}, -1, :open, :close, '…', 12), bm25({fts})
+        FROM {fts} JOIN space_objects o ON o.id = {fts}.rowid
+        WHERE {fts} MATCH :query ORDER BY bm25({fts}) LIMIT :limit""",
+    'space_system': """
+        SELECT s.id, s.name, s.id, snippet({fts}, -1, :open, :close, '…', 12), bm25({fts})
+        FROM {fts} JOIN space_systems s ON s.id = {fts}.rowid
+        WHERE {fts} MATCH :query ORDER BY bm25({fts}) LIMIT :limit""",
+}
+SEARCH_URLS = {
+    'news': lambda key: f'/user/{quote(key or "")}',  # у записи нет своей страницы - ведём в профиль автора
+    'space_object': lambda key: f'/space_object/{quote(key)}',
+    'space_system': lambda key: '/database',
+}
+SNIPPET_OPEN, SNIPPET_CLOSE = '\x02', '\x03'  # метки совпадений, которых нет в обычном тексте
+
+
+def create_search_index(engine):
+    """Создание таблиц FTS5 и триггеров синхронизации (если их ещё нет) с первичным заполнением"""
+    with engine.begin() as connection:
+        existing = {row[0] for row in connection.execute(text("SELECT name FROM sqlite_master"))}
+        for table, fields in SEARCH_SOURCES.values():
+            fts = f'{table}_fts'
+            columns = ', '.join(fields)
+            new_values = ', '.join(f'new.{field}' for field in fields)
+            old_values = ', '.join(f'old.{field}' for field in fields)
+            if fts not in existing:
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='{table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"))
+                connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"))
+            connection.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {columns} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"))
+
+
+def match_query(query):
+    """Безопасный запрос MATCH: каждое слово - отдельная фраза с поиском по префиксу"""
+    words = [word.replace('"', '""') for word in query.split()]
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search(db_sess, query, kinds=None, user_id=None, limit=20):
+    """Полнотекстовый поиск, результаты отсортированы по релевантности (bm25)"""
+    match = match_query(query)
+    if not match:
+        return []
+    results = []
+    for kind in kinds or SEARCH_SOURCES:
+        fts = f'{SEARCH_SOURCES[kind][0]}_fts'
+        rows = db_sess.execute(text(SEARCH_QUERIES[kind].format(fts=fts)), {
+            'query': match, 'user_id': user_id, 'limit': limit,
+            'open': SNIPPET_OPEN, 'close': SNIPPET_CLOSE})
+        for item_id, title, key, snippet, rank in rows:
+            results.append({'kind': kind, 'id': item_id, 'title': title, 'url': SEARCH_URLS[kind](key),
+                            'snippet': highlight(snippet), 'rank': rank})
+    results.sort(key=lambda result: result['rank'])
+    return results[:limit]
+
+
+def highlight(snippet):
+    """html-фрагмент с совпадениями в <mark>; остальной текст экранируется"""
+    return Markup(str(escape(snippet or '')).replace(SNIPPET_OPEN, '<mark>').replace(SNIPPET_CLOSE, '</mark>'))
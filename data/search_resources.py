@@ -0,0 +1,22 @@
+from flask_restful import Resource, abort
+from data import db_session
+from data.parsers import search_parser
+from data.search import SEARCH_SOURCES, search
+from data.serializers import json_response
+
+
+class SearchResource(Resource):
+    """Ресурс полнотекстового поиска (restful-api)"""
+
+    def get(self):
+        """Поиск по записям, космическим объектам и звёздным системам"""
+        args = search_parser.parse_args()
+        kinds = args['kind'] or None
+        if kinds and set(kinds) - set(SEARCH_SOURCES):
+            abort(400, message=f"kind must be one of: {', '.join(SEARCH_SOURCES)}")
+        if not 0 < args['limit'] <= 100:
+            abort(400, message="limit must be between 1 and 100")
+        results = search(db_session.create_session(), args['q'], kinds=kinds, limit=args['limit'])
+        for result in results:
+            result['snippet'] = str(result['snippet'])
+        return json_response({'results': results})
@@ -0,0 +1,97 @@
+import datetime
+import operator
+from flask import current_app, jsonify
+from sqlalchemy.orm import joinedload
+
+try:
+    import orjson  # необязательный быстрый json-кодировщик
+except ImportError:
+    orjson = None
+
+DATE_FORMAT = '%Y-%m-%d'  # те же форматы, что и у SerializerMixin
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class Serializer:
+    """Сериализатор модели для фиксированного набора полей (замена to_dict(only=...)).
+
+    Функция извлечения полей собирается один раз при первом использовании,
+    поля связанных моделей ('user.name') загружаются тем же запросом через options."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        self._serialize = None
+        self._options = None
+
+    def __call__(self, item):
+        """Словарь с полями записи"""
+        if self._serialize is None:
+            self._compile()
+        return self._serialize(item)
+
+    def many(self, items):
+        """Список словарей с полями записей"""
+        if self._serialize is None:
+            self._compile()
+        return list(map(self._serialize, items))
+
+    @property
+    def options(self):
+        """Опции запроса для загрузки связанных моделей одним запросом"""
+        if self._options is None:
+            self._compile()
+        return self._options
+
+    def _compile(self):
+        """Сборка функции извлечения полей и опций загрузки связей"""
+        mapper = self.model.__mapper__
+        columns, relations = [], {}
+        for field in self.fields:
+            if '.' in field:
+                relation, rest = field.split('.', 1)
+                relations.setdefault(relation, []).append(rest)
+            else:
+                columns.append(field)
+        plain, converted = [], []
+        for field in columns:
+            column = mapper.columns.get(field)
+            python_type = column.type.python_type if column is not None else None
+            if python_type is datetime.datetime:
+                converted.append((field, operator.attrgetter(field), DATETIME_FORMAT))
+            elif python_type is datetime.date:
+                converted.append((field, operator.attrgetter(field), DATE_FORMAT))
+            else:
+                plain.append(field)
+        get_plain = operator.attrgetter(*plain) if plain else None
+        nested, options = [], []
+        for relation, fields in relations.items():
+            related = Serializer(mapper.relationships[relation].mapper.class_, fields)
+            nested.append((relation, operator.attrgetter(relation), related))
+            loader = joinedload(getattr(self.model, relation))
+            options.append(loader.options(*related.options) if related.options else loader)
+        single = len(plain) == 1
+
+        def serialize(item):
+            if get_plain is None:
+                data = {}
+            elif single:
+                data = {plain[0]: get_plain(item)}
+            else:
+                data = dict(zip(plain, get_plain(item)))
+            for field, get, date_format in converted:
+                value = get(item)
+                data[field] = value.strftime(date_format) if value is not None else None
+            for relation, get, related in nested:
+                value = get(item)
+                data[relation] = related(value) if value is not None else None
+            return data
+
+        self._serialize, self._options = serialize, options
+
+
+def json_response(payload):
+    """json-ответ; кодируется через orjson, если он установлен"""
+    if orjson is None:
+        return jsonify(payload)
+    return current_app.response_class(orjson.dumps(payload), mimetype='application/json')
@@ -0,0 +1,170 @@
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from flask import has_request_context, render_template, request
+from sqlalchemy import event
+from data.access import admin_required
+from data.query_plans import FULL_SCAN
+
+SLOW_QUERY_LOG = 'logs/slow_queries.log'  # журнал медленных запросов (json по строке на запрос)
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024  # размер файла журнала до ротации
+SLOW_QUERY_LOG_BACKUPS = 3  # сколько старых файлов журнала хранить
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")  # строки и числа, подставленные в текст запроса
+PLACEHOLDER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')  # IN (?, ?, ...) с разным числом параметров
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(statement):
+    """Запрос без конкретных значений: одинаковые по смыслу запросы группируются вместе"""
+    statement = LITERALS.sub('?', statement)
+    statement = PLACEHOLDER_LISTS.sub('(...)', statement)
+    return WHITESPACE.sub(' ', statement).strip()
+
+
+def describe_parameter(value):
+    """Параметр запроса для журнала: только тип и размер - значения (хэши паролей, почта,
+    текст закрытых записей) в журнал не попадают"""
+    if value is None:
+        return 'None'
+    if isinstance(value, (str, bytes, memoryview)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def explain(dbapi_connection, statement, parameters):
+    """EXPLAIN QUERY PLAN в обход SQLAlchemy (иначе он сам попал бы в журнал)"""
+    if not EXPLAINABLE.match(statement):
+        return []
+    try:
+        cursor = dbapi_connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except sqlite3.Error as error:
+        return [f'{type(error).__name__}: {error}']
+
+
+class SlowQueryLog:
+    """Журнал запросов к базе, выполнявшихся дольше порога: текст без значений, типы параметров,
+    маршрут и план запроса.
+
+    Включается настройкой SLOW_QUERY_MS (переменная окружения с тем же именем). Журнал - общий файл
+    всех процессов с ротацией; страница /slow_queries (только для администратора) группирует его записи
+    по нормализованному запросу.
+    Ротацию выполняет тот процесс, который первым превысил размер, поэтому при нескольких
+    процессах gunicorn несколько записей рядом с ротацией могут попасть в старый файл."""
+
+    def __init__(self, app=None):
+        self.threshold = None  # порог, с; None - журнал выключен
+        self.path = SLOW_QUERY_LOG
+        self._log = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Порог и файл журнала из настроек приложения, страница /slow_queries"""
+        threshold = app.config.get('SLOW_QUERY_MS')
+        self.threshold = threshold / 1000 if threshold is not None else None
+        self.path = app.config.get('SLOW_QUERY_LOG', SLOW_QUERY_LOG)
+        app.add_url_rule('/slow_queries', 'slow_queries', admin_required(self.page))
+
+    def watch(self, engine):
+        """Замер запросов движка (подключается в db_session.global_init)"""
+        event.listen(engine, 'before_cursor_execute', self._start)
+        event.listen(engine, 'after_cursor_execute', self._finish)
+        event.listen(engine, 'handle_error', self._discard)
+
+    def _start(self, conn, cursor, statement, parameters, context, executemany):
+        """Начало запроса"""
+        if self.threshold is not None:
+            conn.info.setdefault('slow_query_started', []).append(time.perf_counter())
+
+    def _finish(self, conn, cursor, statement, parameters, context, executemany):
+        """Запись запроса в журнал, если он выполнялся дольше порога"""
+        started = conn.info.get('slow_query_started')
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        threshold = self.threshold
+        if threshold is None or duration < threshold:
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.record(cursor.connection, statement, parameters, duration)
+
+    @staticmethod
+    def _discard(context):
+        """Запрос завершился ошибкой - его замер не нужен"""
+        if context.connection is not None:
+            started = context.connection.info.get('slow_query_started')
+            if started:
+                started.pop()
+
+    def record(self, dbapi_connection, statement, parameters, duration):
+        """Запись медленного запроса"""
+        values = parameters.values() if isinstance(parameters, dict) else parameters or ()
+        entry = {'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                 'ms': round(duration * 1000, 3),
+                 'route': (request.endpoint or 'none') if has_request_context() else 'background',
+                 'path': request.path if has_request_context() else None,  # без строки запроса
+                 'normalized': normalize(statement),
+                 'parameter_types': [describe_parameter(value) for value in values],
+                 'plan': explain(dbapi_connection, statement, parameters or ())}
+        self._logger().warning(json.dumps(entry, ensure_ascii=False))
+
+    def _logger(self):
+        """Логгер с файлом журнала, создаётся при первой медленной записи
+        (созданный при импорте отключил бы logging.config.fileConfig, например в alembic)"""
+        if self._log is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=SLOW_QUERY_LOG_BYTES,
+                                          backupCount=SLOW_QUERY_LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            log = logging.getLogger(__name__)
+            log.addHandler(handler)
+            log.propagate = False  # json-строки не дублируются в общий журнал
+            self._log = log
+        return self._log
+
+    def files(self):
+        """Файлы журнала от нового к старому"""
+        paths = [self.path] + [f'{self.path}.{number}' for number in range(1, SLOW_QUERY_LOG_BACKUPS + 1)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def aggregate(self):
+        """Запросы из журнала, сгруппированные по нормализованному тексту, по убыванию суммарного времени"""
+        statements = {}
+        for path in reversed(self.files()):  # от старых записей к новым: у группы остаётся последний план
+            with open(path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # строка, недописанная при ротации
+                        continue
+                    item = statements.setdefault(entry['normalized'], {
+                        'statement': entry['normalized'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                        'routes': Counter()})
+                    item['count'] += 1
+                    item['total_ms'] += entry['ms']
+                    item['max_ms'] = max(item['max_ms'], entry['ms'])
+                    item['routes'][entry['route']] += 1
+                    item.update(last=entry['time'], parameter_types=entry.get('parameter_types', []), plan=entry['plan'])
+        items = sorted(statements.values(), key=lambda item: item['total_ms'], reverse=True)
+        for item in items:
+            item['mean_ms'] = item['total_ms'] / item['count']
+            item['full_scan'] = any(FULL_SCAN.match(step) for step in item['plan'])
+            item['routes'] = item['routes'].most_common()
+        return items
+
+    def page(self):
+        """Страница с самыми дорогими запросами"""
+        return render_template('slow_queries.html', title='Медленные запросы',
+                               threshold=self.threshold, statements=self.aggregate())
+
+
+slow_query_log = SlowQueryLog()
@@ -1,34 +1,31 @@
+import datetime
 from flask import jsonify
-from flask_restful import abort, Resource
 from data import db_session
 from data.space_objects import SpaceObject
 from data.parsers import space_object_parser
+from data.resources import ModelResource, ModelListResource, ExportResource, ImportResource
+from data.serializers import Serializer, json_response
 
+SPACE_OBJECT_FIELDS = ('name', 'space_type', 'radius', 'period', 'ex', 'v', 'p', 'g',
+                       'm', 'sputnik', 'atmosphere', 'about', 'user.name', 'image_path')  # поля в ответах api
 
-class SpaceObjectsResource(Resource):
+
+class SpaceObjectsResource(ModelResource):
     """Ресурс космического объекта (restful-api)"""
+    model = SpaceObject
+    title = 'Space object'
+    serializer = Serializer(SpaceObject, SPACE_OBJECT_FIELDS)
 
     def get(self, space_object_id):
         """Получение космического объекта"""
-        abort_if_space_object_not_found(space_object_id)
-        session = db_session.create_session()
-        space_object = session.query(SpaceObject).get(space_object_id)
-        return jsonify(
-            {
-                'space_object':
-                    space_object.to_dict(
-                        only=(
-                            'name', 'space_type', 'radius', 'period', 'ex', 'v', 'p', 'g',
-                            'm', 'sputnik', 'atmosphere', 'about', 'user.name', 'image_path'))
-            }
-        )
+        session, space_object = self.get_item(space_object_id)
+        return self.respond(space_object, 'space_object')
 
     def post(self, space_object_id):
         """Изменение космического объекта"""
-        abort_if_space_object_not_found(space_object_id)
+        session, space_object = self.get_item(space_object_id)
+        self.check_version(space_object)
         args = space_object_parser.parse_args()
-        session = db_session.create_session()
-        space_object = session.query(SpaceObject).get(space_object_id)
         space_object.name = args['name']
         space_object.space_type = args['space_type']
         space_object.radius = args['radius']
@@ -43,35 +40,37 @@ class SpaceObjectsResource(Resource):
         space_object.about = args['about']
         space_object.creator = args['creator']
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success(space_object)
 
     def delete(self, space_object_id):
         """Удаление космического объекта"""
-        abort_if_space_object_not_found(space_object_id)
-        session = db_session.create_session()
-        space_object = session.query(SpaceObject).get(space_object_id)
+        session, space_object = self.get_item(space_object_id)
+        self.check_version(space_object)
         session.delete(space_object)
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success()
 
 
-class SpaceObjectsListResource(Resource):
+class SpaceObjectsListResource(ModelListResource):
     """Ресурс списка космических объектов (restful-api)"""
+    model = SpaceObject
+    sort_fields = ('id', 'name', 'radius', 'period', 'm', 'created_date')
+    filters = {
+        'system': ('system', 'eq', int),
+        'space_type': ('space_type', 'eq', str),
+        'creator': ('creator', 'eq', int),
+        'm_gt': ('m', 'gt', float),
+        'm_lt': ('m', 'lt', float),
+        'radius_gt': ('radius', 'gt', float),
+        'radius_lt': ('radius', 'lt', float),
+        'created_after': ('created_date', 'gt', datetime.datetime),
+    }
+    serializer = Serializer(SpaceObject, SPACE_OBJECT_FIELDS)
 
     def get(self):
-        """Получение всех космических объектов"""
-        session = db_session.create_session()
-        space_objects = session.query(SpaceObject).all()
-        return jsonify(
-            {
-                'space_objects':
-                    [item.to_dict(
-                        only=(
-                            'name', 'space_type', 'radius', 'period', 'ex', 'v', 'p', 'g',
-                            'm', 'sputnik', 'atmosphere', 'about', 'user.name', 'image_path'))
-                        for item in space_objects]
-            }
-        )
+        """Получение страницы космических объектов"""
+        space_objects, next_url = self.get_page()
+        return json_response({'space_objects': self.serializer.many(space_objects), 'next': next_url})
 
     def post(self):
         """Создание космического объекта"""
@@ -97,9 +96,11 @@ class SpaceObjectsListResource(Resource):
         return jsonify({'success': 'OK'})
 
 
-def abort_if_space_object_not_found(space_object_id):
-    """Обработка ситуации, когда космического объекта с указанным id не существует"""
-    session = db_session.create_session()
-    space_object = session.query(SpaceObject).get(space_object_id)
-    if not space_object:
-        abort(404, message=f"Space object {space_object_id} not found")
+class SpaceObjectsExportResource(ExportResource):
+    """Ресурс выгрузки космических объектов в NDJSON (restful-api)"""
+    model = SpaceObject
+
+
+class SpaceObjectsImportResource(ImportResource):
+    """Ресурс загрузки космических объектов из NDJSON (restful-api)"""
+    model = SpaceObject
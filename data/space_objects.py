@@ -8,6 +8,10 @@ from data.db_session import SqlAlchemyBase
 class SpaceObject(SqlAlchemyBase, SerializerMixin):
     """Модель космического объекта"""
     __tablename__ = 'space_objects'
+    __table_args__ = (
+        sqlalchemy.Index('ix_space_objects_system_id', 'system', 'id'),  # объекты системы
+        sqlalchemy.Index('ix_space_objects_creator', 'creator'),  # объекты пользователя
+    )
 
     id = sqlalchemy.Column(sqlalchemy.Integer,
                            primary_key=True, autoincrement=True)
@@ -24,6 +28,8 @@ class SpaceObject(SqlAlchemyBase, SerializerMixin):
     atmosphere = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # описание атмосферы
     about = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # общее описание
     image_path = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # путь к изображению объекта
+    image_srcset = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # уменьшенные копии изображения
+    image_srcset_webp = sqlalchemy.Column(sqlalchemy.String, nullable=True)  # копии изображения в WebP
     system = sqlalchemy.Column(sqlalchemy.Integer,
                                sqlalchemy.ForeignKey("space_systems.id"))  # id системы, в которой находится объект
     creator = sqlalchemy.Column(sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"))  # id создателя объекта
@@ -1,66 +1,63 @@
-from flask import jsonify
-from flask_restful import abort, Resource
+import datetime
+import math
+from flask import current_app, jsonify
+from flask_restful import Resource, abort
 from data import db_session
+from data.ephemeris import positions, time_grid
+from data.space_objects import SpaceObject
 from data.space_systems import SpaceSystem
-from data.parsers import space_system_parser
+from data.parsers import ephemeris_parser, space_system_parser
+from data.resources import ModelResource, ModelListResource, ExportResource, ImportResource
+from data.serializers import Serializer, json_response
 
 
-class SpaceSystemsResource(Resource):
+class SpaceSystemsResource(ModelResource):
     """Ресурс звёздной системы (restful-api)"""
+    model = SpaceSystem
+    title = 'Space system'
+    serializer = Serializer(SpaceSystem, ('name', 'galaxy', 'about', 'user.name'))
 
     def get(self, space_system_id):
         """Получение звёздной системы"""
-        abort_if_space_system_not_found(space_system_id)
-        session = db_session.create_session()
-        space_system = session.query(SpaceSystem).get(space_system_id)
-        return jsonify(
-            {
-                'space_system':
-                    space_system.to_dict(
-                        only=(
-                            'name', 'galaxy', 'about', 'user.name'))
-            }
-        )
+        session, space_system = self.get_item(space_system_id)
+        return self.respond(space_system, 'space_system')
 
     def post(self, space_system_id):
         """Изменение звёздной системы"""
-        abort_if_space_system_not_found(space_system_id)
+        session, space_system = self.get_item(space_system_id)
+        self.check_version(space_system)
         args = space_system_parser.parse_args()
-        session = db_session.create_session()
-        space_system = session.query(SpaceSystem).get(space_system_id)
         space_system.name = args['name']
         space_system.galaxy = args['galaxy']
         space_system.about = args['about']
         space_system.creator = args['creator']
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success(space_system)
 
     def delete(self, space_system_id):
         """Удаление звёздной системы"""
-        abort_if_space_system_not_found(space_system_id)
-        session = db_session.create_session()
-        space_system = session.query(SpaceSystem).get(space_system_id)
+        session, space_system = self.get_item(space_system_id)
+        self.check_version(space_system)
         session.delete(space_system)
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success()
 
 
-class SpaceSystemsListResource(Resource):
+class SpaceSystemsListResource(ModelListResource):
     """Ресурс списка звёздных систем (restful-api)"""
+    model = SpaceSystem
+    sort_fields = ('id', 'name', 'created_date')
+    filters = {
+        'galaxy': ('galaxy', 'eq', str),
+        'creator': ('creator', 'eq', int),
+        'created_after': ('created_date', 'gt', datetime.datetime),
+    }
+    serializer = Serializer(SpaceSystem, ('name', 'galaxy', 'about', 'user.name'))
 
     def get(self):
-        """Получение всех звёздных систем"""
-        session = db_session.create_session()
-        space_systems = session.query(SpaceSystem).all()
-        return jsonify(
-            {
-                'space_systems':
-                    [item.to_dict(
-                        only=(
-                            'name', 'galaxy', 'about', 'user.name'))
-                        for item in space_systems]
-            }
-        )
+        """Получение страницы звёздных систем"""
+        space_systems, next_url = self.get_page()
+        return json_response({'space_systems': self.serializer.many(space_systems), 'next': next_url})
 
     def post(self):
         """Создание звёздной системы"""
@@ -77,9 +74,49 @@ class SpaceSystemsListResource(Resource):
         return jsonify({'success': 'OK'})
 
 
-def abort_if_space_system_not_found(space_system_id):
-    """Обработка ситуации, когда звёздной системы с указанным id не существует"""
-    session = db_session.create_session()
-    space_system = session.query(SpaceSystem).get(space_system_id)
-    if not space_system:
-        abort(404, message=f"Space system {space_system_id} not found")
+class SpaceSystemEphemerisResource(Resource):
+    """Ресурс положений тел звёздной системы по элементам орбит (restful-api).
+
+    json: координаты каждого тела; binary: float32 little-endian массив (тела, моменты, x/y),
+    id тел в заголовке X-Ephemeris-Bodies, размеры - в X-Ephemeris-Shape."""
+    max_times = 100000  # моментов в одном ответе
+    max_points = 5000000  # тел x моментов в одном ответе
+
+    def get(self, space_system_id):
+        """Положения тел (а.е.) в моменты t0, t0 + step, ... <= t1 (годы)"""
+        args = ephemeris_parser.parse_args()
+        t0, t1, step = args['t0'], args['t1'], args['step']
+        if not all(map(math.isfinite, (t0, t1, step))) or step <= 0 or t1 < t0:
+            abort(400, message="Expected finite t0 <= t1 and step > 0")
+        if (t1 - t0) / step >= self.max_times:
+            abort(400, message=f"At most {self.max_times} time steps are allowed")
+        session = db_session.create_session()
+        if session.query(SpaceSystem.id).filter(SpaceSystem.id == space_system_id).first() is None:
+            abort(404, message=f"Space system {space_system_id} not found")
+        bodies = session.query(SpaceObject.id, SpaceObject.name, SpaceObject.radius, SpaceObject.period,
+                               SpaceObject.ex).filter(SpaceObject.system == space_system_id).order_by(
+            SpaceObject.id).all()
+        times = time_grid(t0, t1, step)
+        if len(bodies) * len(times) > self.max_points:
+            abort(400, message=f"At most {self.max_points} positions (bodies x time steps) are allowed")
+        ids, names, a, period, e = zip(*bodies) if bodies else ((), (), (), (), ())
+        result = positions(a, period, e, times)  # пустые поля (None) становятся nan и не мешают расчёту
+        if args['format'] == 'binary':
+            response = current_app.response_class(result.astype('<f4').tobytes(),
+                                                  mimetype='application/octet-stream')
+            response.headers['X-Ephemeris-Shape'] = ','.join(map(str, result.shape))
+            response.headers['X-Ephemeris-Bodies'] = ','.join(map(str, ids))
+            return response
+        return json_response({'space_system': space_system_id, 't0': t0, 'step': step, 'times': len(times),
+                              'bodies': [{'id': body_id, 'name': name, 'positions': body.round(6).tolist()}
+                                         for body_id, name, body in zip(ids, names, result)]})
+
+
+class SpaceSystemsExportResource(ExportResource):
+    """Ресурс выгрузки звёздных систем в NDJSON (restful-api)"""
+    model = SpaceSystem
+
+
+class SpaceSystemsImportResource(ImportResource):
+    """Ресурс загрузки звёздных систем из NDJSON (restful-api)"""
+    model = SpaceSystem
@@ -8,6 +8,9 @@ from data.db_session import SqlAlchemyBase
 class SpaceSystem(SqlAlchemyBase, SerializerMixin):
     """Модель звёздной системы"""
     __tablename__ = 'space_systems'
+    __table_args__ = (
+        sqlalchemy.Index('ix_space_systems_creator', 'creator'),  # системы пользователя
+    )
 
     id = sqlalchemy.Column(sqlalchemy.Integer,
                            primary_key=True, autoincrement=True)
@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from flask import abort, request, send_from_directory
+from werkzeug.utils import safe_join
+from data.metrics import timed
+
+try:
+    import brotli  # необязательно: без него создаются только .gz
+except ImportError:
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60  # срок кэширования файлов с хэшем в имени, с
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map')  # изображения уже сжаты
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # в порядке предпочтения
+COMPRESSORS = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+if brotli:
+    COMPRESSORS['.br'] = lambda data: brotli.compress(data, quality=11)
+CONTENT_ADDRESSED = ('img/media/',)  # папки, где имя файла уже является хэшем содержимого
+SKIPPED = ('img/',)  # изображения записей указываются путями из базы, а не через url_for
+
+
+class StaticAssets:
+    """Статические файлы с хэшем содержимого в адресе, вечным кэшированием и заранее сжатыми копиями"""
+
+    def __init__(self, app=None):
+        self.folder = None
+        self.hashed = {}  # исходное имя -> имя с хэшем
+        self.originals = {}  # имя с хэшем -> исходное имя
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Подключение к приложению: адреса url_for('static', ...) получают хэш, static отдаётся через serve"""
+        self.folder = app.static_folder
+        self.build_manifest()
+        app.url_defaults(self._fingerprint)
+        app.view_functions['static'] = self.serve
+
+    def build_manifest(self):
+        """Подсчёт хэшей всех статических файлов, кроме изображений"""
+        hashed, originals = {}, {}
+        for filename in self.files():
+            if filename.startswith(SKIPPED):
+                continue
+            with open(os.path.join(self.folder, filename), 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()[:12]
+            stem, ext = os.path.splitext(filename)
+            hashed[filename] = f'{stem}.{digest}{ext}'
+            originals[hashed[filename]] = filename
+        self.hashed, self.originals = hashed, originals
+
+    def files(self):
+        """Имена статических файлов относительно static (без сжатых копий)"""
+        for root, dirs, files in os.walk(self.folder):
+            for name in files:
+                if not name.endswith(tuple(ext for encoding, ext in ENCODINGS)):
+                    yield os.path.relpath(os.path.join(root, name), self.folder).replace(os.sep, '/')
+
+    def compress(self):
+        """Создание сжатых копий (.gz, .br) для текстовых файлов, у которых их нет или они устарели"""
+        created = 0
+        for filename in self.files():
+            if not filename.endswith(COMPRESSIBLE):
+                continue
+            path = os.path.join(self.folder, filename)
+            with open(path, 'rb') as file:
+                data = file.read()
+            for ext, compress in COMPRESSORS.items():
+                if not self._is_fresh(path, path + ext):
+                    with open(path + ext, 'wb') as file:
+                        file.write(compress(data))
+                    created += 1
+        return created
+
+    def serve(self, filename):
+        """Отдача статического файла: сжатая копия по Accept-Encoding, вечный кэш для адресов с хэшем"""
+        original = self.originals.get(filename, filename)
+        immutable = original != filename or filename.startswith(CONTENT_ADDRESSED)
+        path = safe_join(self.folder, original)
+        with timed('file'):
+            if path is None or not os.path.isfile(path):
+                abort(404)
+            return self._send(path, original, immutable)
+
+    def _send(self, path, original, immutable):
+        """Ответ с файлом (или его сжатой копией) и заголовками кэширования"""
+        max_age = IMMUTABLE_MAX_AGE if immutable else None  # без хэша - проверка актуальности при каждом показе
+        response = None
+        compressible = original.endswith(COMPRESSIBLE)
+        if compressible:
+            mimetype = mimetypes.guess_type(original)[0] or 'application/octet-stream'
+            for encoding, ext in ENCODINGS:
+                if request.accept_encodings[encoding] and self._is_fresh(path, path + ext):
+                    response = send_from_directory(self.folder, original + ext, mimetype=mimetype,
+                                                   max_age=max_age)
+                    response.headers['Content-Encoding'] = encoding
+                    break
+        if response is None:
+            response = send_from_directory(self.folder, original, max_age=max_age)
+        if compressible:
+            response.vary.add('Accept-Encoding')
+        if immutable:  # содержимое по этому адресу никогда не меняется - повторных запросов не будет
+            response.cache_control.immutable = True
+        return response
+
+    def _fingerprint(self, endpoint, values):
+        """Подстановка имени с хэшем в url_for('static', filename=...)"""
+        if endpoint == 'static' and values.get('filename') in self.hashed:
+            values['filename'] = self.hashed[values['filename']]
+
+    @staticmethod
+    def _is_fresh(path, compressed_path):
+        """Сжатая копия есть и не старше исходного файла"""
+        return os.path.exists(compressed_path) and os.path.getmtime(compressed_path) >= os.path.getmtime(path)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from data.users import User
+
+USER_CACHE_TTL = 60  # сколько секунд пользователь берётся из кэша (изменения в других процессах видны не позже)
+USER_CACHE_SIZE = 1024  # сколько пользователей держать в памяти
+
+
+class UserCache:
+    """Кэш пользователей для flask_login с ограничением по времени жизни и вытеснением давно не использованных.
+
+    В кэше лежат отсоединённые от сессий объекты; запрос получает их копию в своей сессии (merge без запроса к базе)."""
+
+    def __init__(self, ttl=USER_CACHE_TTL, max_size=USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # id -> (момент устаревания, пользователь)
+        self._lock = threading.Lock()
+        self.generation = 0  # растёт при каждом сбросе, чтобы не сохранить пользователя, изменённого во время загрузки
+        self.hits = self.misses = 0
+
+    def load(self, db_sess, user_id):
+        """Пользователь в сессии запроса: из кэша или из базы"""
+        user_id = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return db_sess.merge(entry[1], load=False)
+            self.misses += 1
+            generation = self.generation
+        user = db_sess.query(User).get(user_id)
+        if user is None:
+            return None
+        detached = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+        make_transient_to_detached(detached)  # копия только с полями, не связанная ни с одной сессией
+        with self._lock:
+            if generation != self.generation:
+                return user
+            self._entries[user_id] = (now + self.ttl, detached)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, *user_ids):
+        """Сброс пользователей после изменения"""
+        with self._lock:
+            self.generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Сброс всего кэша"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Статистика попаданий"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / requests if requests else 0.0, 'entries': len(self._entries)}
+
+
+user_cache = UserCache()
+
+
+def changed_user_ids(session):
+    """id пользователей, поля которых меняются в этой сессии (изменения только связей не считаются)"""
+    user_ids = set()
+    for obj in (*session.dirty, *session.deleted):
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        if obj in session.deleted or any(state.attrs[attr.key].history.has_changes()
+                                         for attr in inspect(User).column_attrs):
+            user_ids.add(obj.id)
+    return user_ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_users(session, flush_context):
+    """Запоминаем изменённых пользователей до подтверждения транзакции"""
+    session.info.setdefault('changed_user_ids', set()).update(changed_user_ids(session))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_users(session):
+    """Сброс изменённых пользователей после подтверждения"""
+    user_ids = session.info.pop('changed_user_ids', None)
+    if user_ids:
+        user_cache.invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_users(session, previous_transaction):
+    """Изменения отменены - кэш остаётся прежним"""
+    session.info.pop('changed_user_ids', None)
@@ -1,33 +1,30 @@
+import datetime
 from flask import jsonify, request
-from flask_restful import abort, Resource
 from data import db_session
 from data.users import User
 from data.parsers import user_parser
+from data.resources import ModelResource, ModelListResource
+from data.serializers import Serializer, json_response
 
+USER_FIELDS = ('username', 'surname', 'name', 'age', 'about', 'email')  # поля в ответах api
 
-class UsersResource(Resource):
+
+class UsersResource(ModelResource):
     """Ресурс пользователя (restful-api)"""
+    model = User
+    title = 'User'
+    serializer = Serializer(User, USER_FIELDS)
 
     def get(self, user_id):
         """Получение пользователя"""
-        abort_if_user_not_found(user_id)
-        session = db_session.create_session()
-        user = session.query(User).get(user_id)
-        return jsonify(
-            {
-                'user':
-                    user.to_dict(
-                        only=(
-                            'username', 'surname', 'name', 'age', 'about', 'email'))
-            }
-        )
+        session, user = self.get_item(user_id)
+        return self.respond(user, 'user')
 
     def post(self, user_id):
         """Изменение пользователя"""
-        abort_if_user_not_found(user_id)
+        session, user = self.get_item(user_id)
+        self.check_version(user)
         args = user_parser.parse_args()
-        session = db_session.create_session()
-        user = session.query(User).get(user_id)
         user.username = args['username']
         user.surname = args['surname']
         user.name = args['name']
@@ -36,34 +33,32 @@ class UsersResource(Resource):
         user.email = args['email']
         user.set_password(args['password'])
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success(user)
 
     def delete(self, user_id):
         """Удаление пользователя"""
-        abort_if_user_not_found(user_id)
-        session = db_session.create_session()
-        user = session.query(User).get(user_id)
+        session, user = self.get_item(user_id)
+        self.check_version(user)
         session.delete(user)
         session.commit()
-        return jsonify({'success': 'OK'})
+        return self.success()
 
 
-class UsersListResource(Resource):
+class UsersListResource(ModelListResource):
     """Ресурс списка пользователей (restful-api)"""
+    model = User
+    sort_fields = ('id', 'username', 'age', 'created_date')
+    filters = {
+        'age_gt': ('age', 'gt', int),
+        'age_lt': ('age', 'lt', int),
+        'created_after': ('created_date', 'gt', datetime.datetime),
+    }
+    serializer = Serializer(User, USER_FIELDS)
 
     def get(self):
-        """Получение всех пользователей"""
-        session = db_session.create_session()
-        users = session.query(User).all()
-        return jsonify(
-            {
-                'users':
-                    [item.to_dict(
-                        only=(
-                            'username', 'surname', 'name', 'age', 'about', 'email'))
-                        for item in users]
-            }
-        )
+        """Получение страницы пользователей"""
+        users, next_url = self.get_page()
+        return json_response({'users': self.serializer.many(users), 'next': next_url})
 
     def post(self):
         """Создание пользователя"""
@@ -81,11 +76,3 @@ class UsersListResource(Resource):
         session.add(user)
         session.commit()
         return jsonify({'success': 'OK'})
-
-
-def abort_if_user_not_found(user_id):
-    """Обработка ситуации, когда пользователя с указанным id не существует"""
-    session = db_session.create_session()
-    user = session.query(User).get(user_id)
-    if not user:
-        abort(404, message=f"User {user_id} not found")
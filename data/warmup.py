@@ -0,0 +1,30 @@
+import logging
+import time
+from data import db_session
+
+WARMUP_PAGES = ('/', '/database')  # страницы, которые отрисовываются до приёма запросов
+logger = logging.getLogger(__name__)
+
+
+def warmup(app, pages=WARMUP_PAGES):
+    """Подготовка к приёму запросов: компиляция шаблонов и сериализаторов, заполнение кэша страниц.
+
+    Запросы не проходят через before_request, поэтому фоновые исполнители здесь не запускаются."""
+    started = time.perf_counter()
+    templates = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in templates:
+        app.jinja_env.get_template(name)
+    serializers = 0
+    for view in app.view_functions.values():
+        serializer = getattr(getattr(view, 'view_class', None), 'serializer', None)
+        if serializer is not None:
+            serializer.options  # сборка функции извлечения полей
+            serializers += 1
+    for path in pages:
+        with app.test_request_context(path) as context:
+            app.view_functions[context.request.url_rule.endpoint](**context.request.view_args)
+    db_session.dispose_engine()  # соединения, открытые при прогреве, не должны достаться рабочим процессам
+    result = {'templates': len(templates), 'serializers': serializers, 'pages': len(pages),
+              'seconds': round(time.perf_counter() - started, 3)}
+    logger.info('Прогрев завершён: %s', result)
+    return result
@@ -0,0 +1,32 @@
+"""Настройки gunicorn: gunicorn "main:create_app()" (файл подхватывается из текущей папки).
+
+Перезапуск без потери запросов:
+  kill -HUP <master>   - новые рабочие процессы с теми же настройками (код не перечитывается);
+  kill -USR2 <master>  - новый master с обновлённым кодом, затем kill -TERM <старый master>."""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))  # у SQLite один писатель
+threads = int(os.environ.get('WEB_THREADS', 4))  # потоков на процесс
+worker_class = 'gthread'
+preload_app = True  # приложение загружается и прогревается до fork, память общая (copy-on-write)
+# от этого зависит и кэш страниц: общий счётчик сбросов (PageCache._shared_generation) создаётся до fork;
+# без preload у каждого процесса свой счётчик и правки в одном процессе не сбрасывают кэш других - post_fork
+# в этом случае не даёт запуститься (для --reload - WEB_CONCURRENCY=1)
+timeout = 30
+graceful_timeout = 30  # сколько ждать завершения начатых запросов при остановке
+keepalive = 5
+max_requests = 5000  # плановый перезапуск процессов против накопления памяти
+max_requests_jitter = 500
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Рабочий процесс создаёт собственные соединения с базой; без preload_app и с несколькими
+    процессами запуск останавливается: кэш страниц в процессах не был бы согласован"""
+    if not server.cfg.preload_app and server.cfg.workers > 1:
+        raise RuntimeError('Кэш страниц требует preload_app = True при нескольких рабочих процессах '
+                           '(или WEB_CONCURRENCY=1)')
+    from data import db_session
+    db_session.dispose_engine()
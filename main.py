@@ -1,14 +1,32 @@
 import os
+import click
 from flask import Flask, render_template, redirect, make_response, jsonify, abort, request, url_for, send_file
 from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from flask_restful import Api
-from flask_avatars import Avatars
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import joinedload
 from data import db_session, user_resources, news_resources, space_object_resources, space_system_resources
+from data import search_resources
+from data.bulk import export_lines, import_lines
+from data.search import search
+from data.query_plans import check_query_plans
+from data.page_cache import page_cache, cached_page, cache_tags
+from data.images import make_variants
+from data.static_assets import StaticAssets
+from data.avatars import Avatars
+from data.media_store import GC_BATCH_SIZE, store, collect_garbage, adopt_legacy_files
+from data.job_queue import job_queue, enqueue
+from data.user_cache import user_cache
+from data.warmup import warmup
+from data.metrics import metrics, timed
+from data.slow_queries import slow_query_log
+from data.access import admin_required
+from data.nbody import SystemState, simulator
 from data.users import User
 from data.news import News
 from data.space_objects import SpaceObject
 from data.space_systems import SpaceSystem
+from data.pagination import keyset_page
+from data.loaders import load_systems, news_feed
 from forms.news import NewsForm
 from forms.user import RegisterForm, LoginForm, EditUserForm
 from forms.space_system import SpaceSystemForm
@@ -16,7 +34,9 @@ from forms.space_object import SpaceObjectForm
 
 app = Flask(__name__)  # создаём приложение Flask
 app.config['SECRET_KEY'] = 'yandexlyceum_secret_key'  # секретный ключ
-app.config['NEWS_PHOTO_FOLDER'] = 'img/news_photos/'  # путь к ресурсам записей
+app.config['NEWS_PER_PAGE'] = 10  # количество записей на одной странице ленты
+slow_query_ms = os.environ.get('SLOW_QUERY_MS')  # порог журнала медленных запросов, мс (не задан - журнал выключен)
+app.config['SLOW_QUERY_MS'] = float(slow_query_ms) if slow_query_ms else None
 login_manager = LoginManager()  # для авторизации
 login_manager.init_app(app)  # инициализация в приложении
 api = Api(app)  # создание api-ресурса
@@ -26,24 +46,145 @@ api.add_resource(user_resources.UsersResource, '/api/users/<int:user_id>')
 api.add_resource(news_resources.NewsListResource, '/api/news')
 api.add_resource(news_resources.NewsResource, '/api/news/<int:news_id>')
 api.add_resource(space_object_resources.SpaceObjectsListResource, '/api/space_objects')
+api.add_resource(space_object_resources.SpaceObjectsExportResource, '/api/space_objects/export')
+api.add_resource(space_object_resources.SpaceObjectsImportResource, '/api/space_objects/import')
 api.add_resource(space_object_resources.SpaceObjectsResource, '/api/space_objects/<int:space_object_id>')
 api.add_resource(space_system_resources.SpaceSystemsListResource, '/api/space_systems')
+api.add_resource(space_system_resources.SpaceSystemsExportResource, '/api/space_systems/export')
+api.add_resource(space_system_resources.SpaceSystemsImportResource, '/api/space_systems/import')
 api.add_resource(space_system_resources.SpaceSystemsResource, '/api/space_systems/<int:space_system_id>')
+api.add_resource(space_system_resources.SpaceSystemEphemerisResource,
+                 '/api/space_systems/<int:space_system_id>/ephemeris')
+api.add_resource(search_resources.SearchResource, '/api/search')
+metrics.init_app(app)  # время запросов, базы, шаблонов и файлов: /metrics и Server-Timing
+slow_query_log.init_app(app)  # журнал медленных запросов и страница /slow_queries
 avatars = Avatars(app)  # для удобной работы с аватарками
+static_assets = StaticAssets(app)  # статика с хэшем в адресе и сжатыми копиями
+job_queue.init_app(app)  # фоновые задачи: работа с файлами вне запросов
+BULK_MODELS = {'space_objects': SpaceObject, 'space_systems': SpaceSystem}  # модели для выгрузки/загрузки NDJSON
+
+
+def create_app(db_file="db/astro-project.db"):
+    """Подготовка приложения к приёму запросов (для gunicorn: gunicorn "main:create_app()")"""
+    db_session.global_init(db_file)  # объявление базы данных
+    static_assets.compress()  # сжатые копии статики, если их ещё нет
+    warmup(app)  # шаблоны, сериализаторы и кэш страниц готовы до первого запроса
+    return app
 
 
 def main():
-    """Запуск приложения"""
-    db_session.global_init("db/astro-project.db")  # объявление базы данных
+    """Запуск приложения на отладочном сервере (в продакшене - gunicorn, см. gunicorn.conf.py)"""
+    create_app()
     port = int(os.environ.get("PORT", 5000))  # порт
     app.run(host='0.0.0.0', port=port)  # запуск
 
 
+@app.cli.command('export')
+@click.argument('table', type=click.Choice(sorted(BULK_MODELS)))
+@click.argument('file', type=click.File('w', encoding='utf-8'))
+def export_command(table, file):
+    """Выгрузка таблицы в NDJSON: FLASK_APP=main flask export space_objects objects.ndjson"""
+    db_session.global_init("db/astro-project.db")
+    for line in export_lines(BULK_MODELS[table]):
+        file.write(line)
+
+
+@app.cli.command('import')
+@click.argument('table', type=click.Choice(sorted(BULK_MODELS)))
+@click.argument('file', type=click.File('rb'))
+def import_command(table, file):
+    """Загрузка таблицы из NDJSON: FLASK_APP=main flask import space_objects objects.ndjson"""
+    db_session.global_init("db/astro-project.db")
+    inserted, errors = import_lines(BULK_MODELS[table], file)
+    for error in errors:
+        click.echo(f"Строка {error['line']}: {error['error']}", err=True)
+    click.echo(f"Добавлено записей: {inserted}, ошибок: {len(errors)}")
+
+
+@app.cli.command('check-plans')
+def check_plans_command():
+    """Проверка, что запросы маршрутов не проходят всю таблицу: FLASK_APP=main flask check-plans"""
+    db_session.global_init("db/astro-project.db")
+    failures = check_query_plans(db_session.create_session())
+    for name, plan in failures.items():
+        click.echo(f"{name}: {'; '.join(plan)}", err=True)
+    if failures:
+        raise SystemExit(1)
+    click.echo("Все запросы используют индексы")
+
+
+@app.cli.command('build-image-variants')
+def build_image_variants_command():
+    """Создание копий для уже загруженных изображений: FLASK_APP=main flask build-image-variants"""
+    db_session.global_init("db/astro-project.db")
+    db_sess = db_session.create_session()
+    count = 0
+    for news in db_sess.query(News).filter(News.photo_path != None, News.photo_srcset == None):
+        news.photo_srcset, news.photo_srcset_webp = make_variants(news.photo_path[len('/static/'):])
+        count += 1
+    for space_object in db_sess.query(SpaceObject).filter(SpaceObject.image_path != None,
+                                                          SpaceObject.image_srcset == None):
+        space_object.image_srcset, space_object.image_srcset_webp = make_variants(
+            space_object.image_path[len('/static/'):])
+        count += 1
+    db_sess.commit()
+    click.echo(f"Обработано изображений: {count}")
+
+
+@app.cli.command('build-static')
+def build_static_command():
+    """Создание сжатых копий (.gz, .br) статических файлов: FLASK_APP=main flask build-static"""
+    click.echo(f"Создано сжатых файлов: {static_assets.compress()}")
+
+
+@app.cli.command('run-jobs')
+def run_jobs_command():
+    """Выполнение накопившихся фоновых задач без запуска сервера: FLASK_APP=main flask run-jobs"""
+    db_session.global_init("db/astro-project.db")
+    click.echo(f"Выполнено задач: {job_queue.run_pending()}")
+
+
+@app.cli.command('collect-media')
+@click.option('--batch-size', default=GC_BATCH_SIZE, help='Файлов за одну транзакцию')
+def collect_media_command(batch_size):
+    """Учёт старых загрузок и удаление файлов, на которые не ссылается ни одна запись:
+    FLASK_APP=main flask collect-media"""
+    db_session.global_init("db/astro-project.db")
+    db_sess = db_session.create_session()
+    adopted = adopt_legacy_files(db_sess)
+    removed = collect_garbage(db_sess, batch_size=batch_size)
+    click.echo(f"Учтено старых файлов: {adopted}, удалено файлов: {removed}")
+
+
+@app.cli.command('simulate')
+@click.option('--years', default=10.0, help='Интервал моделирования, годы')
+@click.option('--dt', default=0.001, help='Шаг интегрирования, годы')
+@click.option('--scheme', type=click.Choice(['yoshida', 'leapfrog']), default='yoshida')
+@click.option('--workers', type=int, default=None, help='Процессов (по умолчанию - по числу ядер)')
+def simulate_command(years, dt, scheme, workers):
+    """Моделирование движения тел всех систем каталога: FLASK_APP=main flask simulate"""
+    db_session.global_init("db/astro-project.db")
+    systems = db_session.create_session().query(SpaceSystem).options(
+        joinedload(SpaceSystem.space_objects)).order_by(SpaceSystem.id).all()
+    systems = [system for system in systems if system.space_objects]
+    states = [SystemState.from_space_system(system) for system in systems]
+    results = simulator.simulate_many(states, years=years, dt=dt, scheme=scheme, workers=workers)
+    for system, state, result in zip(systems, states, results):
+        click.echo(f"{system.name}: тел {len(state.names)}, ошибка энергии {result['energy_error']:.2e}")
+    click.echo(f"Рассчитано систем: {simulator.misses}, из кэша: {simulator.hits}")
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    """Загрузка текущего пользователя"""
+    """Загрузка текущего пользователя (из кэша - без запроса к базе)"""
     db_sess = db_session.create_session()
-    return db_sess.query(User).get(user_id)
+    return user_cache.load(db_sess, user_id)
+
+
+@app.teardown_appcontext
+def shutdown_session(exception=None):
+    """Закрытие сессии базы данных по окончании запроса"""
+    db_session.remove_session()
 
 
 @app.route('/logout')
@@ -59,43 +200,72 @@ def logout():
 def main_page():
     """Главная страница"""
     db_sess = db_session.create_session()
-    if current_user.is_authenticated:  # если авторизован
-        news = db_sess.query(News).filter(
-            (News.user == current_user) | (News.is_private != True))  # все свои записи
-    else:
-        news = db_sess.query(News).filter(News.is_private != True)  # только публичные
-    return render_template("main_page.html", title="AstroCat", news=news, avatars=avatars)  # отображение html-файла
+    query = news_feed(db_sess, current_user.id if current_user.is_authenticated else None)
+    news, newer, older = keyset_page(query, News, app.config['NEWS_PER_PAGE'],
+                                     before=request.args.get('before'),
+                                     after=request.args.get('after'))  # одна страница ленты
+    return render_template("main_page.html", title="AstroCat", news=news, avatars=avatars,
+                           newer=newer, older=older)  # отображение html-файла
 
 
 @app.route("/database")
+@cached_page('database')
 def data_page():
     """Страница с Базой Данных"""
     db_sess = db_session.create_session()
-    solar_system = db_sess.query(SpaceSystem).filter(SpaceSystem.id == 1).first()  # специально для Солнечной системы
-    systems = db_sess.query(SpaceSystem).filter(SpaceSystem.id != 1)  # все остальные
+    solar_system, systems = load_systems(db_sess)  # все системы с объектами за постоянное число запросов
     return render_template("data_page.html", title="AstroCat", systems=systems, solar_system=solar_system)
 
 
+@app.route('/search')
+def search_page():
+    """Страница полнотекстового поиска"""
+    query = request.args.get('q', '').strip()
+    results = []
+    if query:
+        user_id = current_user.id if current_user.is_authenticated else None  # свои личные записи тоже ищутся
+        results = search(db_session.create_session(), query, user_id=user_id)
+    return render_template('search.html', title='Поиск', query=query, results=results)
+
+
 @app.route('/space_object/<name>')
+@cached_page()
 def space_object_info(name):
     """Страница с информацией о космическом объекте"""
     db_sess = db_session.create_session()
     space_object = db_sess.query(SpaceObject).filter(SpaceObject.name == name).first()  # поиск по имени
     if space_object:
+        cache_tags(f'space_object:{space_object.id}', f'space_system:{space_object.system}')
         return render_template('space_object_info.html', title=space_object.name, space_object=space_object)
     return make_response(jsonify({'error': 'Not found'}), 404)  # если не найден
 
 
 @app.route('/user/<username>')
+@cached_page()
 def user_profile(username):
     """Страница с профилем пользователя"""
     db_sess = db_session.create_session()
     user = db_sess.query(User).filter(User.username == username).first()  # поиск по логину
     if user:
+        cache_tags(f'user:{user.id}')
         return render_template('user_profile.html', title='Профиль', user=user, news=user.news)
     return make_response(jsonify({'error': 'Not found'}), 404)
 
 
+@app.route('/cache_stats')
+@admin_required
+def cache_stats():
+    """Статистика кэша страниц и кэша пользователей"""
+    return jsonify(dict(page_cache.stats(), users=user_cache.stats()))
+
+
+@app.route('/job_stats')
+@admin_required
+def job_stats():
+    """Глубина очереди фоновых задач и задержки их выполнения"""
+    return jsonify(job_queue.stats())
+
+
 @app.route('/register', methods=['GET', 'POST'])
 def reqister():
     """Страница с формой регистрации"""
@@ -159,9 +329,8 @@ def add_news():
         news.is_private = form.is_private.data
         file = form.photo.data  # загрузка файла (изображения)
         if file:
-            filename = secure_filename(file.filename)
-            news.photo_path = url_for('static', filename=app.config['NEWS_PHOTO_FOLDER'] + filename)
-            file.save(f'static/img/news_photos/{filename}')  # сохранение файла
+            blob = store(db_sess, file)  # сохранение файла (одинаковые файлы хранятся один раз)
+            news.photo_path, news.photo_srcset, news.photo_srcset_webp = blob.path, blob.srcset, blob.srcset_webp
         current_user.news.append(news)
         db_sess.merge(current_user)
         db_sess.commit()
@@ -196,12 +365,9 @@ def edit_news(id):
             news.content = form.content.data.strip()
             news.is_private = form.is_private.data
             file = form.photo.data
-            if file:
-                if news.photo_path:
-                    os.remove(news.photo_path[1:])
-                filename = secure_filename(file.filename)
-                news.photo_path = url_for('static', filename=app.config['NEWS_PHOTO_FOLDER'] + filename)
-                file.save(f'static/img/news_photos/{filename}')
+            if file:  # старый файл удалит сборщик мусора, если на него больше нет ссылок
+                blob = store(db_sess, file)
+                news.photo_path, news.photo_srcset, news.photo_srcset_webp = blob.path, blob.srcset, blob.srcset_webp
             db_sess.commit()
             return redirect(f'/user/{news.user.username}')
         else:
@@ -222,9 +388,7 @@ def delete_news(id):
                                       ).first()
     if news:
         user = news.user
-        if news.photo_path:  # если было изображение
-            os.remove(news.photo_path[1:])  # удаляем
-        db_sess.delete(news)  # удаление
+        db_sess.delete(news)  # удаление (изображение удалит сборщик мусора)
         db_sess.commit()
         return redirect(f'/user/{user.username}')
     else:
@@ -249,10 +413,6 @@ def add_system():
         current_user.space_systems.append(system)
         db_sess.merge(current_user)
         db_sess.commit()
-        db_sess = db_session.create_session()
-        new_system = db_sess.query(SpaceSystem).filter(SpaceSystem.name == system.name).first()
-        os.mkdir(
-            f'static/img/system_{new_system.id}')  # создание папки для изображения космических объектов системы
         return redirect('/database')
     return render_template('space_system.html', title='AstroCat',
                            form=form)
@@ -304,10 +464,10 @@ def delete_system(id):
                                                ).first()
     if system:
         for space_object in system.space_objects:
-            if space_object.image_path:
-                os.remove(space_object.image_path[1:])
-            db_sess.delete(space_object)
-        os.rmdir(f'static/img/system_{system.id}')
+            db_sess.delete(space_object)  # изображения удалит сборщик мусора
+        folder = f'static/img/system_{system.id}'  # папка из версий до хранилища: файлы без ссылок удалит задача
+        if os.path.isdir(folder):
+            enqueue(db_sess, 'remove_dir', path=folder)
         db_sess.delete(system)
         db_sess.commit()
         return redirect('/database')
@@ -342,15 +502,9 @@ def add_space_object(id):
         space_object.system = id
         file = form.image.data
         if file:
-            filename = secure_filename(file.filename)
-            if id == 1:
-                space_object.image_path = url_for('static',
-                                                  filename='img/solar_img/' + filename)
-                file.save(f'static/img/solar_img/{filename}')
-            else:
-                space_object.image_path = url_for('static',
-                                                  filename=f'img/system_{id}/' + filename)
-                file.save(f'static/img/system_{id}/{filename}')
+            blob = store(db_sess, file)  # сохранение файла (одинаковые файлы хранятся один раз)
+            space_object.image_path = blob.path
+            space_object.image_srcset, space_object.image_srcset_webp = blob.srcset, blob.srcset_webp
         current_user.space_objects.append(space_object)
         db_sess.merge(current_user)
         db_sess.commit()
@@ -404,20 +558,10 @@ def edit_space_object(name):
             space_object.atmosphere = form.atmosphere.data.strip()
             space_object.about = form.about.data.strip()
             file = form.image.data
-            if file:
-                filename = secure_filename(file.filename)
-                if space_object.space_system.id == 1:
-                    if space_object.image_path:
-                        os.remove(space_object.image_path[1:])
-                    space_object.image_path = url_for('static',
-                                                      filename='img/solar_img/' + filename)
-                    file.save(f'static/img/solar_img/{filename}')
-                else:
-                    if space_object.image_path:
-                        os.remove(space_object.image_path[1:])
-                    space_object.image_path = url_for('static',
-                                                      filename=f'img/system_{space_object.space_system.id}/' + filename)
-                    file.save(f'static/img/system_{space_object.space_system.id}/{filename}')
+            if file:  # старый файл удалит сборщик мусора, если на него больше нет ссылок
+                blob = store(db_sess, file)
+                space_object.image_path = blob.path
+                space_object.image_srcset, space_object.image_srcset_webp = blob.srcset, blob.srcset_webp
             db_sess.commit()
             return redirect(f'/space_object/{space_object.name}')
         else:
@@ -437,9 +581,7 @@ def delete_space_object(name):
                                                      (SpaceObject.user == current_user) | (current_user.id == 1)
                                                      ).first()
     if space_object:
-        if space_object.image_path:
-            os.remove(space_object.image_path[1:])
-        db_sess.delete(space_object)
+        db_sess.delete(space_object)  # изображение удалит сборщик мусора
         db_sess.commit()
         return redirect('/database')
     else:
@@ -489,7 +631,8 @@ def edit_user(username):
 @app.route('/download_file')
 def download_file():
     """Загрузка файла (модели Солнечной системы)"""
-    return send_file('app/dist/modelSolarSystem.exe')
+    with timed('file'):
+        return send_file('app/dist/modelSolarSystem.exe')
 
 
 @app.errorhandler(404)
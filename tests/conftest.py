@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import __all_models  # noqa: E402  все модели регистрируются в SqlAlchemyBase
+from data.db_session import SqlAlchemyBase  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    """Пустая база в памяти со схемой приложения"""
+    engine = sa.create_engine('sqlite://')
+    SqlAlchemyBase.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
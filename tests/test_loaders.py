@@ -0,0 +1,51 @@
+import sqlalchemy as sa
+from sqlalchemy import orm
+from data.db_session import SqlAlchemyBase
+from data.loaders import load_systems
+from data.space_objects import SpaceObject
+from data.space_systems import SpaceSystem
+from data.users import User
+
+OBJECTS_PER_SYSTEM = 3
+
+
+def add_systems(session, count):
+    """Системы 1..count, у каждой свой создатель и несколько объектов с создателями"""
+    for number in range(1, count + 1):
+        user = User(username=f'user{number}', name=f'User {number}', email=f'user{number}@example.com')
+        system = SpaceSystem(id=number, name=f'System {number}', galaxy='Млечный Путь', user=user)
+        system.space_objects = [SpaceObject(name=f'Object {number}-{index}', space_type='Планета', user=user)
+                                for index in range(OBJECTS_PER_SYSTEM)]
+        session.add(system)
+    session.commit()
+    session.expunge_all()  # загрузка пойдёт из базы, а не из карты идентичности
+
+
+def count_queries(systems_count):
+    """Число запросов загрузки систем вместе со всем, что читает шаблон страницы /database"""
+    engine = sa.create_engine('sqlite://')
+    SqlAlchemyBase.metadata.create_all(engine)
+    statements = []
+    sa.event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    with orm.Session(bind=engine) as session:
+        add_systems(session, systems_count)
+        statements.clear()
+        solar_system, systems = load_systems(session)
+        for system in [solar_system] + systems:
+            system.user.name
+            for space_object in system.space_objects:
+                space_object.user.name
+    engine.dispose()
+    return len(statements)
+
+
+def test_query_count_does_not_depend_on_number_of_systems():
+    assert count_queries(1) == count_queries(25)
+
+
+def test_solar_system_is_separated(engine):
+    with orm.Session(bind=engine) as session:
+        add_systems(session, 3)
+        solar_system, systems = load_systems(session)
+        assert solar_system.id == 1
+        assert [system.id for system in systems] == [2, 3]
@@ -0,0 +1,72 @@
+import datetime
+import os
+import pytest
+from flask import Flask
+from sqlalchemy import orm
+from data.media_blobs import MediaBlob
+from data.media_store import _remove_dir, adopt_legacy_files, collect_garbage
+from data.news import News
+from data.space_objects import SpaceObject
+
+SHARED = '/static/img/news_photos/photo.jpg'  # старая загрузка, общая для двух записей
+OWN = '/static/img/system_2/planet.png'
+
+
+@pytest.fixture
+def session(engine, tmp_path, monkeypatch):
+    """Сессия с приложением Flask и папкой static во временном каталоге"""
+    monkeypatch.chdir(tmp_path)
+    for path, content in ((SHARED, b'photo'), (OWN, b'planet')):
+        os.makedirs(os.path.dirname(path[1:]), exist_ok=True)
+        with open(path[1:], 'wb') as file:
+            file.write(content)
+    with Flask(__name__).app_context(), orm.Session(bind=engine) as session:
+        yield session
+
+
+def test_legacy_files_are_collected_after_last_reference(session):
+    first, second = News(title='1', photo_path=SHARED), News(title='2', photo_path=SHARED)
+    space_object = SpaceObject(name='Planet', image_path=OWN)
+    session.add_all([first, second, space_object])
+    session.commit()
+    assert adopt_legacy_files(session) == 2
+    assert adopt_legacy_files(session) == 0
+    assert session.query(MediaBlob).filter(MediaBlob.path == SHARED).one().refcount == 2
+
+    session.delete(first)
+    space_object.image_path = None
+    session.commit()
+    assert collect_garbage(session, grace=datetime.timedelta()) == 1
+    assert os.path.exists(SHARED[1:]) and not os.path.exists(OWN[1:])
+
+    session.delete(second)
+    session.commit()
+    assert collect_garbage(session, grace=datetime.timedelta()) == 1
+    assert not os.path.exists(SHARED[1:])
+
+
+def test_same_content_under_two_paths(session):
+    copy = '/static/img/news_photos/copy.jpg'
+    with open(copy[1:], 'wb') as file:
+        file.write(b'photo')
+    session.add_all([News(title='1', photo_path=SHARED), News(title='2', photo_path=copy)])
+    session.commit()
+    assert adopt_legacy_files(session) == 2
+    assert {blob.path for blob in session.query(MediaBlob)} == {SHARED, copy}
+
+
+def test_system_folder_keeps_only_referenced_files(session):
+    folder = os.path.dirname(OWN[1:])
+    for name in ('old.png', 'old-320.png'):
+        with open(os.path.join(folder, name), 'wb') as file:
+            file.write(b'old')
+    space_object = SpaceObject(name='Planet', image_path=OWN)
+    session.add(space_object)
+    session.commit()
+    _remove_dir(session, folder)
+    assert os.listdir(folder) == ['planet.png']
+
+    session.delete(space_object)
+    session.commit()
+    _remove_dir(session, folder)
+    assert not os.path.exists(folder)
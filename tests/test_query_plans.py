@@ -0,0 +1,64 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import orm
+from data.db_session import SqlAlchemyBase
+from data.news import News
+from data.query_plans import FULL_SCAN, check_query_plans, explain, full_scans, route_plans, route_queries
+from data.search import create_search_index
+from data.space_objects import SpaceObject
+from data.space_systems import SpaceSystem
+from data.users import User
+
+
+@pytest.fixture(scope='module')
+def session(tmp_path_factory):
+    """Сессия для временного файла SQLite со схемой приложения и несколькими записями
+    (без записей загрузка систем не выполняет запрос объектов и он не попал бы в проверку)"""
+    path = tmp_path_factory.mktemp('plans') / 'astro.db'
+    engine = sa.create_engine(f'sqlite:///{path}')
+    SqlAlchemyBase.metadata.create_all(engine)
+    create_search_index(engine)
+    session = orm.Session(bind=engine)
+    user = User(username='user', name='User', email='user@example.com')
+    for number in (1, 2):
+        system = SpaceSystem(id=number, name=f'System {number}', galaxy='Млечный Путь', user=user)
+        system.space_objects = [SpaceObject(name=f'Object {number}', space_type='Планета', user=user)]
+        session.add(system)
+    session.add_all([News(title='Public', is_private=False, user=user), News(title='Private', user=user)])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def route_names():
+    """Названия проверяемых маршрутов (функции не вызываются, база не нужна)"""
+    return list(route_queries(orm.Session()).keys())
+
+
+@pytest.mark.parametrize('name', route_names())
+def test_route_queries_use_indexes(session, name):
+    allowed = route_queries(session)[name][1]
+    plans = route_plans(session, name)
+    assert plans
+    for statement, plan in plans:
+        assert not full_scans(plan, allowed), (statement, plan)
+
+
+def test_real_route_queries_are_checked(session):
+    statements = [statement for statement, _ in route_plans(session, 'data_page')]
+    assert len(statements) == 2  # системы с создателями и объекты систем (selectinload)
+    assert 'space_objects.system IN' in statements[1]
+    feed = route_plans(session, 'main_page: новые записи')[0][0]
+    assert 'JOIN users' in feed and 'ASC' in feed  # автор тем же запросом, листание к новым
+
+
+def test_check_query_plans_reports_nothing(session):
+    assert check_query_plans(session) == {}
+
+
+def test_full_scan_is_detected(session):
+    session.execute(sa.text('CREATE TABLE plain (value INTEGER)'))
+    plan = explain(session, 'SELECT * FROM plain WHERE value = ?', (1,))
+    assert any(FULL_SCAN.match(step) for step in plan)
+    assert full_scans(plan) and not full_scans(plan, ('plain',))